@@ -1,5 +1,6 @@
 import boto3
 from pprint import pprint
+from user_data import render_user_data
 
 # ---------------- AWS Session ----------------
 # Use your AWS CLI profile and set the region explicitly
@@ -56,13 +57,8 @@ def create_security_group(vpc_id):
 
 # Function to launch EC2 instance with user data
 def launch_ec2_instance(subnet_id, security_group_id):
-    user_data_script = """#!/bin/bash
-yum update -y
-yum install -y httpd
-systemctl start httpd
-systemctl enable httpd
-echo "<h1>My Company Website</h1>" | sudo tee /var/www/html/index.html
-"""
+    # Same tuned httpd profile as the web tier launch template (see user_data.py)
+    user_data_script = render_user_data()
 
     instance = ec2.run_instances(
         ImageId=AMI_ID,
@@ -1,12 +1,21 @@
 import boto3
-import base64
+import hashlib
 from botocore.exceptions import ClientError
+from access_logs import enable_access_logs
+import blue_green
+from instance_refresh import roll_out
+from instance_types import select_instance_types
+from inventory import Inventory, LOAD_BALANCER
+from journal import Journal
+from launch_profiles import apply_profile, print_changes, template_changes
+from user_data import ALB_IDLE_TIMEOUT, HEALTH_CHECK_PATH, encode, render_user_data
 
 # ---------------- AWS Session ----------------
 session = boto3.session.Session(profile_name="boto3-user", region_name="us-east-1")
 ec2 = session.client('ec2')
 elbv2 = session.client('elbv2')
 autoscaling = session.client('autoscaling')
+cloudfront = session.client('cloudfront')
 
 # ---------------- Parameters ----------------
 launch_template_name = 'Company-Web-Tier-Server'
@@ -24,83 +33,191 @@ target_group_name = f"{sanitized_name}-TG"
 lb_name = f"{sanitized_name}-LB"[:32]
 asg_name = f"{sanitized_name}"
 
+# ---------------- Mixed Instances (optional) ----------------
+# On-demand base capacity with Spot above it, spread over several instance types
+use_mixed_instances = False
+on_demand_base_capacity = 2
+on_demand_percentage_above_base = 0  # everything above the base runs on Spot
+spot_allocation_strategy = 'price-capacity-optimized'
+instance_type_overrides = []  # leave empty to let the selector pick candidates
+
+# ---------------- Rolling Deploy ----------------
+# When the launch template already exists, publish the template below as a new
+# version and roll the running ASG onto it with an instance refresh.
+rolling_deploy = False
+refresh_preferences = {
+    'min_healthy_percentage': 90,
+    'checkpoints': (50, 100),  # pause after half the fleet is replaced
+    'checkpoint_delay': 300,  # seconds
+    'skip_matching': True,  # leave instances already on the new version alone
+    'instance_warmup': 300,  # seconds
+}
+
+# ---------------- Blue/Green Deploy ----------------
+# Alternative to the rolling deploy: build the idle colour (second ASG + target
+# group) from the new template, pre-warm it and shift listener weights in steps.
+blue_green_deploy = False
+blue_green_options = {
+    'weight_steps': (10, 25, 50, 100),  # % of traffic on the new colour
+    'bake_seconds': 180,  # observe each step this long before gating
+    'max_p99_seconds': 1.0,  # TargetResponseTime p99 gate
+    'max_5xx_rate': 0.01,  # HTTPCode_Target_5XX_Count / RequestCount gate
+    'retire_previous': True,  # scale the old colour to 0 once 100% is live
+}
+
+# ---------------- CloudFront (optional) ----------------
+create_cloudfront = False
+wait_for_cloudfront = True  # block until the distribution is deployed (can take several minutes)
+static_path_patterns = ['/index.html', '/static/*', '*.css', '*.js', '*.png', '*.jpg', '*.svg', '*.ico']
+origin_keepalive_timeout = 55  # seconds, keep below the ALB idle timeout (60s) so the ALB never closes first
+origin_read_timeout = 30  # seconds
+# AWS managed policies
+CACHING_OPTIMIZED_POLICY_ID = '658327ea-f89d-4fab-a63d-7e88639e58f6'  # static: long TTLs, gzip/brotli keys
+CACHING_DISABLED_POLICY_ID = '4135ea2d-6df8-44a3-9df3-4b5a84be39ad'  # dynamic: always go to the origin
+ALL_VIEWER_ORIGIN_REQUEST_POLICY_ID = '216adef6-5c7f-47e4-b989-5492eafa07d3'  # forward headers/cookies/query
+
+# ---------------- Launch Template Profile ----------------
+# 'baseline', 'general' or 'io-heavy' (see launch_profiles.py): gp3 root volume,
+# EBS-optimized, detailed monitoring, IMDSv2, placement group and CPU credits
+launch_profile = 'baseline'
+allow_non_nitro = False  # profiles other than 'baseline' reject Xen types such as t2 unless this is set
+placement_group_name = f"{sanitized_name}-PG"
+
+# ---------------- Access Logs (optional) ----------------
+# Per-request latency for access_logs.py; the bucket and its delivery policy are created if needed
+enable_alb_access_logs = False
+access_log_bucket = 'company-alb-access-logs'
+access_log_prefix = 'web-tier'
+
 # ---------------- User Data ----------------
-user_data_script = '''#!/bin/bash
-yum update -y
-yum install -y httpd
-systemctl start httpd
-systemctl enable httpd
-cd /var/www/html
-echo "<h1>My Company Website</h1>" > index.html
-'''
-user_data_encoded = base64.b64encode(user_data_script.encode('utf-8')).decode('utf-8')
+# Tuned httpd profile (event MPM, keep-alive, compression, /health), see user_data.py
+user_data_script = render_user_data()
+user_data_encoded = encode(user_data_script)
+
+# ---------------- Provisioning Journal ----------------
+# Every step below is journaled; rerun with --resume to continue after a failure
+journal = Journal('web-tier')
 
 # ---------------- Create Launch Template ----------------
-try:
-    response = ec2.create_launch_template(
-        LaunchTemplateName=launch_template_name,
-        VersionDescription='Web tier server template',
-        LaunchTemplateData={
-            'ImageId': ami_id,
-            'InstanceType': instance_type,
-            'KeyName': key_name,
-            'SecurityGroupIds': security_group_ids,
-            'UserData': user_data_encoded
-        }
-    )
-    print("✅ Launch template created successfully.")
-    print("Launch Template ID:", response['LaunchTemplate']['LaunchTemplateId'])
+launch_template_data = {
+    'ImageId': ami_id,
+    'InstanceType': instance_type,
+    'KeyName': key_name,
+    'SecurityGroupIds': security_group_ids,
+    'UserData': user_data_encoded
+}
+launch_template_data = apply_profile(ec2, launch_template_data, launch_profile, placement_group_name,
+                                     allow_non_nitro)
 
-except ClientError as e:
-    if "already exists" in e.response['Error']['Message']:
-        print("ℹ️ Launch template already exists, proceeding...")
-    else:
-        print("❌ Failed to create launch template:")
-        print(e.response['Error']['Message'])
+
+def create_launch_template():
+    try:
+        response = ec2.create_launch_template(
+            LaunchTemplateName=launch_template_name,
+            VersionDescription='Web tier server template',
+            LaunchTemplateData=launch_template_data
+        )
+        print("✅ Launch template created successfully.")
+        print("Launch Template ID:", response['LaunchTemplate']['LaunchTemplateId'])
+    except ClientError as e:
+        if "already exists" not in e.response['Error']['Message']:
+            raise
+        version, changes = template_changes(ec2, launch_template_name, launch_template_data)
+        if not changes:
+            print(f"ℹ️ Launch template already matches version {version}, proceeding...")
+            return {'LaunchTemplateName': launch_template_name}
+        print_changes(version, changes)
+        if blue_green_deploy:
+            print("ℹ️ Launch template already exists, starting a blue/green deploy...")
+            lb = Inventory(session).refresh([LOAD_BALANCER]).get(LOAD_BALANCER, lb_name)
+            deployed = lb and blue_green.deploy(session, lb['id'], launch_template_name, launch_template_data,
+                                                sanitized_name, **blue_green_options)
+            exit(0 if deployed else 1)
+        if rolling_deploy:
+            print("ℹ️ Launch template already exists, rolling out a new version...")
+            lb = Inventory(session).refresh([LOAD_BALANCER]).get(LOAD_BALANCER, lb_name)
+            live_group = lb and blue_green.live_group_for_load_balancer(elbv2, autoscaling, lb['id'])
+            live_asg_name = live_group['AutoScalingGroupName'] if live_group else asg_name
+            deployed = roll_out(ec2, autoscaling, launch_template_name, launch_template_data,
+                                live_asg_name, 'Web tier server template', **refresh_preferences)
+            exit(0 if deployed else 1)
+        # Versions are only published by a deploy, the running fleet keeps the current one
+        print(f"⚠️ Launch template left at version {version}, enable rolling_deploy or blue_green_deploy to publish the changes.")
+    return {'LaunchTemplateName': launch_template_name}
+
+
+journal.step('launch-template', launch_template_data, create_launch_template,
+             verify=lambda out: ec2.describe_launch_templates(LaunchTemplateNames=[out['LaunchTemplateName']]))
 
 # ---------------- Create Target Group ----------------
-try:
-    tg_response = elbv2.create_target_group(
-        Name=target_group_name,
-        Protocol='HTTP',
-        Port=80,
-        VpcId=vpc_id,
-        TargetType='instance',
-        HealthCheckProtocol='HTTP',
-        HealthCheckPort='80',
-        HealthCheckPath='/',
-        HealthCheckIntervalSeconds=30,
-        HealthCheckTimeoutSeconds=5,
-        HealthyThresholdCount=2,
-        UnhealthyThresholdCount=2,
-        Matcher={'HttpCode': '200'}
-    )
+def create_target_group():
+    try:
+        tg_response = elbv2.create_target_group(
+            Name=target_group_name,
+            Protocol='HTTP',
+            Port=80,
+            VpcId=vpc_id,
+            TargetType='instance',
+            HealthCheckProtocol='HTTP',
+            HealthCheckPort='80',
+            HealthCheckPath=HEALTH_CHECK_PATH,
+            HealthCheckIntervalSeconds=30,
+            HealthCheckTimeoutSeconds=5,
+            HealthyThresholdCount=2,
+            UnhealthyThresholdCount=2,
+            Matcher={'HttpCode': '200'}
+        )
+    except ClientError as e:
+        # ELBv2 returns the existing group when the settings match, so this one differs
+        if e.response['Error']['Code'] != 'DuplicateTargetGroupName':
+            raise
+        existing = elbv2.describe_target_groups(Names=[target_group_name])['TargetGroups'][0]
+        print(f"ℹ️ Target group '{target_group_name}' already exists with other settings, proceeding...")
+        return {'TargetGroupArn': existing['TargetGroupArn']}
     target_group_arn = tg_response['TargetGroups'][0]['TargetGroupArn']
     print("✅ Target group created:", target_group_arn)
-except ClientError as e:
-    print("❌ Failed to create target group:")
-    print(e.response['Error']['Message'])
-    target_group_arn = None
+    return {'TargetGroupArn': target_group_arn}
+
+
+target_group_arn = journal.step(
+    'target-group', {'Name': target_group_name, 'VpcId': vpc_id}, create_target_group,
+    verify=lambda out: elbv2.describe_target_groups(TargetGroupArns=[out['TargetGroupArn']])
+)['TargetGroupArn']
 
 # ---------------- Create Load Balancer ----------------
-try:
-    lb_response = elbv2.create_load_balancer(
-        Name=lb_name,
-        Subnets=subnet_ids,
-        Scheme='internet-facing',
-        Type='application',
-        IpAddressType='ipv4'
-    )
+def create_load_balancer():
+    try:
+        lb_response = elbv2.create_load_balancer(
+            Name=lb_name,
+            Subnets=subnet_ids,
+            Scheme='internet-facing',
+            Type='application',
+            IpAddressType='ipv4'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'DuplicateLoadBalancerName':
+            raise
+        print(f"ℹ️ Load balancer '{lb_name}' already exists, proceeding...")
+        lb_response = elbv2.describe_load_balancers(Names=[lb_name])
     lb_arn = lb_response['LoadBalancers'][0]['LoadBalancerArn']
-    lb_dns = lb_response['LoadBalancers'][0]['DNSName']
-    print("✅ Load balancer created:", lb_arn)
-except ClientError as e:
-    print("❌ Failed to create load balancer:")
-    print(e.response['Error']['Message'])
-    lb_arn = None
+    # httpd's KeepAliveTimeout is rendered just above this value
+    elbv2.modify_load_balancer_attributes(
+        LoadBalancerArn=lb_arn,
+        Attributes=[{'Key': 'idle_timeout.timeout_seconds', 'Value': str(ALB_IDLE_TIMEOUT)}]
+    )
+    print("✅ Load balancer ready:", lb_arn)
+    return {'LoadBalancerArn': lb_arn, 'DNSName': lb_response['LoadBalancers'][0]['DNSName']}
+
+
+load_balancer = journal.step(
+    'load-balancer', {'Name': lb_name, 'Subnets': subnet_ids}, create_load_balancer,
+    verify=lambda out: elbv2.describe_load_balancers(LoadBalancerArns=[out['LoadBalancerArn']])
+)
+lb_arn = load_balancer['LoadBalancerArn']
+lb_dns = load_balancer['DNSName']
 
 # ---------------- Create Listener ----------------
-if lb_arn and target_group_arn:
+def create_listener():
     try:
         listener_response = elbv2.create_listener(
             LoadBalancerArn=lb_arn,
@@ -111,55 +228,121 @@ if lb_arn and target_group_arn:
                 'TargetGroupArn': target_group_arn
             }]
         )
-        print("✅ Listener created on port 80.")
     except ClientError as e:
-        print("❌ Failed to create listener:")
-        print(e.response['Error']['Message'])
-else:
-    print("⚠️ Listener creation skipped due to previous errors.")
+        if e.response['Error']['Code'] != 'DuplicateListener':
+            raise
+        # Port 80 already forwards somewhere (e.g. to a blue/green colour), leave it as it is
+        listeners = elbv2.describe_listeners(LoadBalancerArn=lb_arn)['Listeners']
+        print("ℹ️ Listener on port 80 already exists, proceeding...")
+        return {'ListenerArn': next(l['ListenerArn'] for l in listeners if l['Port'] == 80)}
+    print("✅ Listener created on port 80.")
+    return {'ListenerArn': listener_response['Listeners'][0]['ListenerArn']}
+
+
+journal.step('listener', {'LoadBalancerArn': lb_arn, 'TargetGroupArn': target_group_arn}, create_listener,
+             verify=lambda out: elbv2.describe_listeners(ListenerArns=[out['ListenerArn']]))
+
+# ---------------- Enable Access Logs ----------------
+def access_logs_enabled(out):
+    attributes = elbv2.describe_load_balancer_attributes(LoadBalancerArn=lb_arn)['Attributes']
+    return {'Key': 'access_logs.s3.enabled', 'Value': 'true'} in attributes
+
+
+if enable_alb_access_logs:
+    journal.step('access-logs', {'LoadBalancerArn': lb_arn, 'Bucket': access_log_bucket, 'Prefix': access_log_prefix},
+                 lambda: enable_access_logs(session, lb_arn, access_log_bucket, access_log_prefix) or {},
+                 verify=access_logs_enabled)
 
 # ---------------- Create Auto Scaling Group ----------------
-try:
-    asg_response = autoscaling.create_auto_scaling_group(
-        AutoScalingGroupName=asg_name,
-        LaunchTemplate={
-            'LaunchTemplateName': launch_template_name,
-            'Version': '$Latest'
+launch_template_spec = {
+    'LaunchTemplateName': launch_template_name,
+    'Version': '$Default'
+}
+if use_mixed_instances:
+    overrides = instance_type_overrides or select_instance_types(ec2, subnet_ids=subnet_ids)
+    if not overrides:
+        print(f"⚠️ No candidate instance type is offered in every AZ of the subnets, using {instance_type} only.")
+        overrides = [instance_type]
+    print("🧮 Instance types for the mixed instances policy:", ", ".join(overrides))
+    launch_config = {'MixedInstancesPolicy': {
+        'LaunchTemplate': {
+            'LaunchTemplateSpecification': launch_template_spec,
+            'Overrides': [{'InstanceType': t} for t in overrides]
         },
-        MinSize=2,
-        MaxSize=3,
-        DesiredCapacity=2,
-        VPCZoneIdentifier=",".join(subnet_ids),
-        TargetGroupARNs=[target_group_arn],
-        HealthCheckType="ELB",
-        HealthCheckGracePeriod=300,
-        NewInstancesProtectedFromScaleIn=False,
-        Tags=[
-            {
-                'Key': 'Name',
-                'Value': 'WebServer-ASG-Instance',
-                'PropagateAtLaunch': True
-            }
-        ]
-    )
+        'InstancesDistribution': {
+            'OnDemandAllocationStrategy': 'prioritized',
+            'OnDemandBaseCapacity': on_demand_base_capacity,
+            'OnDemandPercentageAboveBaseCapacity': on_demand_percentage_above_base,
+            'SpotAllocationStrategy': spot_allocation_strategy
+        }
+    }}
+else:
+    launch_config = {'LaunchTemplate': launch_template_spec}
+
+
+def create_auto_scaling_group():
+    try:
+        autoscaling.create_auto_scaling_group(
+            AutoScalingGroupName=asg_name,
+            **launch_config,
+            MinSize=2,
+            MaxSize=3,
+            DesiredCapacity=2,
+            VPCZoneIdentifier=",".join(subnet_ids),
+            TargetGroupARNs=[target_group_arn],
+            HealthCheckType="ELB",
+            HealthCheckGracePeriod=300,
+            NewInstancesProtectedFromScaleIn=False,
+            Tags=[
+                {
+                    'Key': 'Name',
+                    'Value': 'WebServer-ASG-Instance',
+                    'PropagateAtLaunch': True
+                }
+            ]
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'AlreadyExists':
+            raise
+        print(f"ℹ️ Auto Scaling Group '{asg_name}' already exists, proceeding...")
+        return {'AutoScalingGroupName': asg_name}
     print("✅ Auto Scaling Group created:", asg_name)
-except ClientError as e:
-    print("❌ Failed to create Auto Scaling Group:")
-    print(e.response['Error']['Message'])
+    return {'AutoScalingGroupName': asg_name}
+
+
+journal.step(
+    'auto-scaling-group', {'Name': asg_name, 'TargetGroupArn': target_group_arn, **launch_config},
+    create_auto_scaling_group,
+    verify=lambda out: autoscaling.describe_auto_scaling_groups(
+        AutoScalingGroupNames=[out['AutoScalingGroupName']])['AutoScalingGroups']
+)
 
 # ---------------- Enable CloudWatch Group Metrics ----------------
-try:
+group_metrics = ['GroupMinSize', 'GroupMaxSize', 'GroupDesiredCapacity']
+
+
+def enable_metrics_collection():
     autoscaling.enable_metrics_collection(
         AutoScalingGroupName=asg_name,
         Granularity='1Minute',
-        Metrics=['GroupMinSize', 'GroupMaxSize', 'GroupDesiredCapacity']
+        Metrics=group_metrics
     )
     print("📊 CloudWatch group metrics collection enabled.")
-except ClientError as e:
-    print("⚠️ Failed to enable CloudWatch metrics:", e.response['Error']['Message'])
+    return {'AutoScalingGroupName': asg_name, 'Metrics': group_metrics}
+
+
+def metrics_enabled(out):
+    groups = autoscaling.describe_auto_scaling_groups(
+        AutoScalingGroupNames=[out['AutoScalingGroupName']])['AutoScalingGroups']
+    enabled = {m['Metric'] for group in groups for m in group.get('EnabledMetrics', [])}
+    return bool(groups) and set(out['Metrics']) <= enabled
+
+
+journal.step('metrics-collection', {'AutoScalingGroupName': asg_name, 'Metrics': group_metrics},
+             enable_metrics_collection, verify=metrics_enabled)
 
 # ---------------- Create Scaling Policy ----------------
-try:
+def create_scaling_policy():
     policy_response = autoscaling.put_scaling_policy(
         AutoScalingGroupName=asg_name,
         PolicyName="TargetTrackingPolicy",
@@ -174,10 +357,104 @@ try:
         EstimatedInstanceWarmup=300
     )
     print("📈 Target tracking scaling policy created.")
-except ClientError as e:
-    print("⚠️ Failed to create scaling policy:", e.response['Error']['Message'])
+    return {'PolicyARN': policy_response['PolicyARN']}
+
+
+journal.step('scaling-policy', {'AutoScalingGroupName': asg_name}, create_scaling_policy,
+             verify=lambda out: autoscaling.describe_policies(
+                 AutoScalingGroupName=asg_name, PolicyNames=['TargetTrackingPolicy'])['ScalingPolicies'])
+
+# ---------------- Create CloudFront Distribution ----------------
+# Runs last: deploying a distribution can take up to 20 minutes and nothing above depends on it
+def cache_behavior(path_pattern, cache_policy_id, origin_request_policy_id=None, methods=('GET', 'HEAD')):
+    behavior = {
+        'TargetOriginId': lb_name,
+        'ViewerProtocolPolicy': 'redirect-to-https',
+        'AllowedMethods': {
+            'Quantity': len(methods),
+            'Items': list(methods),
+            'CachedMethods': {'Quantity': 2, 'Items': ['GET', 'HEAD']}
+        },
+        'CachePolicyId': cache_policy_id,
+        'Compress': True
+    }
+    if origin_request_policy_id:
+        behavior['OriginRequestPolicyId'] = origin_request_policy_id
+    if path_pattern:
+        behavior['PathPattern'] = path_pattern
+    return behavior
+
+
+def find_distribution(origin_domain):
+    # Reruns without --resume find the distribution by its origin instead of creating another one
+    for page in cloudfront.get_paginator('list_distributions').paginate():
+        for item in page['DistributionList'].get('Items', []):
+            if any(o['DomainName'] == origin_domain for o in item['Origins']['Items']):
+                return {'Id': item['Id'], 'DomainName': item['DomainName']}
+    return None
+
+
+def create_distribution():
+    existing = find_distribution(lb_dns)
+    if existing:
+        print(f"ℹ️ CloudFront distribution {existing['Id']} already serves {lb_dns}, proceeding...")
+        return existing
+    all_methods = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'POST', 'PATCH', 'DELETE')
+    static_behaviors = [cache_behavior(pattern, CACHING_OPTIMIZED_POLICY_ID) for pattern in static_path_patterns]
+    cf_response = cloudfront.create_distribution(
+        DistributionConfig={
+            # Stable per ALB, so a retried request cannot create a second distribution
+            'CallerReference': f"{lb_name}-{hashlib.sha1(lb_dns.encode('utf-8')).hexdigest()[:12]}",
+            'Comment': f"Edge cache for {lb_name}",
+            'Enabled': True,
+            'HttpVersion': 'http2and3',
+            'PriceClass': 'PriceClass_All',
+            'Origins': {
+                'Quantity': 1,
+                'Items': [{
+                    'Id': lb_name,
+                    'DomainName': lb_dns,
+                    'CustomOriginConfig': {
+                        'HTTPPort': 80,
+                        'HTTPSPort': 443,
+                        'OriginProtocolPolicy': 'http-only',  # the ALB only listens on port 80
+                        'OriginKeepaliveTimeout': origin_keepalive_timeout,
+                        'OriginReadTimeout': origin_read_timeout
+                    },
+                    'ConnectionAttempts': 3,
+                    'ConnectionTimeout': 10
+                }]
+            },
+            # Everything that is not a static asset is dynamic and passes through uncached
+            'DefaultCacheBehavior': cache_behavior(None, CACHING_DISABLED_POLICY_ID,
+                                                   ALL_VIEWER_ORIGIN_REQUEST_POLICY_ID, all_methods),
+            'CacheBehaviors': {'Quantity': len(static_behaviors), 'Items': static_behaviors}
+        }
+    )
+    cf_id = cf_response['Distribution']['Id']
+    print("✅ CloudFront distribution created:", cf_id)
+
+    if wait_for_cloudfront:
+        print("⏳ Waiting for the CloudFront distribution to deploy...")
+        cloudfront.get_waiter('distribution_deployed').wait(
+            Id=cf_id,
+            WaiterConfig={'Delay': 30, 'MaxAttempts': 40}
+        )
+        print("✅ CloudFront distribution deployed.")
+    return {'Id': cf_id, 'DomainName': cf_response['Distribution']['DomainName']}
+
+
+cf_domain = None
+if create_cloudfront:
+    cf_domain = journal.step(
+        'cloudfront', {'Origin': lb_dns, 'StaticPaths': static_path_patterns}, create_distribution,
+        verify=lambda out: cloudfront.get_distribution(Id=out['Id'])
+    )['DomainName']
 
 # ---------------- Output ALB DNS Name ----------------
 if lb_dns:
     print("\n🌐 Access your site using this ALB DNS name:")
     print(f"http://{lb_dns}")
+if cf_domain:
+    print("🌍 Or through CloudFront:")
+    print(f"https://{cf_domain}")
@@ -1,12 +1,19 @@
+import json
 import boto3
-import base64
 from botocore.exceptions import ClientError
+from access_logs import enable_access_logs
+from instance_refresh import roll_out
+from instance_types import select_instance_types
+from journal import Journal
+from launch_profiles import apply_profile, print_changes, template_changes
+from user_data import ALB_IDLE_TIMEOUT, HEALTH_CHECK_PATH, encode, render_user_data
 
 # ---------------- AWS Session Setup ----------------
 session = boto3.session.Session(profile_name="boto3-user", region_name="us-east-1")
 ec2 = session.client('ec2')
 elbv2 = session.client('elbv2')
 autoscaling = session.client('autoscaling')
+iam = session.client('iam')
 
 # ---------------- Parameters ----------------
 launch_template_name = 'Company-Application-Tier'
@@ -25,121 +32,287 @@ target_group_name = f"{sanitized_name}-TG"
 lb_name = f"{sanitized_name}-LB"[:32]
 asg_name = f"{sanitized_name}"
 
+# ---------------- Mixed Instances (optional) ----------------
+# On-demand base capacity with Spot above it, spread over several instance types
+use_mixed_instances = False
+on_demand_base_capacity = 2
+on_demand_percentage_above_base = 0  # everything above the base runs on Spot
+spot_allocation_strategy = 'price-capacity-optimized'
+instance_type_overrides = []  # leave empty to let the selector pick candidates
+
+# ---------------- Rolling Deploy ----------------
+# When the launch template already exists, publish the template below as a new
+# version and roll the running ASG onto it with an instance refresh.
+rolling_deploy = False
+refresh_preferences = {
+    'min_healthy_percentage': 90,
+    'checkpoints': (50, 100),  # pause after half the fleet is replaced
+    'checkpoint_delay': 300,  # seconds
+    'skip_matching': True,  # leave instances already on the new version alone
+    'instance_warmup': 300,  # seconds
+}
+
+# ---------------- Provisioning Journal ----------------
+# Every step below is journaled; rerun with --resume to continue after a failure
+journal = Journal('app-tier')
+
 # ---------------- Create Security Group ----------------
-try:
-    sg_response = ec2.create_security_group(
-        GroupName=security_group_name,
-        Description='Allows ssh access to application tier',
-        VpcId=vpc_id
-    )
-    security_group_id = sg_response['GroupId']
-    print(f"✅ Security group created: {security_group_name} with ID {security_group_id}")
-
-    # Adding inbound rules to the security group
-    ec2.authorize_security_group_ingress(
-        GroupId=security_group_id,
-        IpPermissions=[
-            {
-                'IpProtocol': 'tcp',
-                'FromPort': 22,
-                'ToPort': 22,
-                'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # SSH from anywhere (Security Risk, change to your IP for production)
-            },
-            {
-                'IpProtocol': 'tcp',
-                'FromPort': 80,
-                'ToPort': 80,
-                'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # HTTP from anywhere (Security Risk)
-            },
-            {
-                'IpProtocol': 'icmp',
-                'FromPort': -1,
-                'ToPort': -1,
-                'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # ICMP from anywhere (Security Risk)
-            }
-        ]
+def create_security_group():
+    try:
+        sg_response = ec2.create_security_group(
+            GroupName=security_group_name,
+            Description='Allows ssh access to application tier',
+            VpcId=vpc_id
+        )
+        security_group_id = sg_response['GroupId']
+        print(f"✅ Security group created: {security_group_name} with ID {security_group_id}")
+
+        # Adding inbound rules to the security group
+        ec2.authorize_security_group_ingress(
+            GroupId=security_group_id,
+            IpPermissions=[
+                {
+                    'IpProtocol': 'tcp',
+                    'FromPort': 22,
+                    'ToPort': 22,
+                    'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # SSH from anywhere (Security Risk, change to your IP for production)
+                },
+                {
+                    'IpProtocol': 'tcp',
+                    'FromPort': 80,
+                    'ToPort': 80,
+                    'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # HTTP from anywhere (Security Risk)
+                },
+                {
+                    'IpProtocol': 'icmp',
+                    'FromPort': -1,
+                    'ToPort': -1,
+                    'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # ICMP from anywhere (Security Risk)
+                }
+            ]
+        )
+    except ClientError as e:
+        if "InvalidGroup.Duplicate" not in e.response['Error']['Code']:
+            raise
+        print(f"ℹ️ Security group '{security_group_name}' already exists. Fetching ID...")
+        sg_existing = ec2.describe_security_groups(
+            Filters=[
+                {'Name': 'group-name', 'Values': [security_group_name]},
+                {'Name': 'vpc-id', 'Values': [vpc_id]}
+            ]
+        )
+        security_group_id = sg_existing['SecurityGroups'][0]['GroupId']
+    return {'GroupId': security_group_id}
+
+
+journal.step('security-group', {'GroupName': security_group_name, 'VpcId': vpc_id}, create_security_group,
+             verify=lambda out: ec2.describe_security_groups(GroupIds=[out['GroupId']]))
+
+# ---------------- Instance Profile ----------------
+# Lets the user data read the Redis endpoint Part6 exports to SSM
+cache_endpoint_parameter = '/company/cache-tier/endpoint'
+instance_role_name = f"{sanitized_name}-Role"
+instance_profile_name = f"{sanitized_name}-Profile"
+
+
+def create_instance_profile():
+    account_id = session.client('sts').get_caller_identity()['Account']
+    parameter_arn = f"arn:aws:ssm:{session.region_name}:{account_id}:parameter{cache_endpoint_parameter}"
+    try:
+        iam.create_role(
+            RoleName=instance_role_name,
+            Description='Application tier instances',
+            AssumeRolePolicyDocument=json.dumps({
+                'Version': '2012-10-17',
+                'Statement': [{'Effect': 'Allow', 'Principal': {'Service': 'ec2.amazonaws.com'},
+                               'Action': 'sts:AssumeRole'}]
+            })
+        )
+        print(f"✅ IAM role '{instance_role_name}' created.")
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'EntityAlreadyExists':
+            raise
+        print(f"ℹ️ IAM role '{instance_role_name}' already exists.")
+    iam.put_role_policy(
+        RoleName=instance_role_name,
+        PolicyName='ReadCacheEndpoint',
+        PolicyDocument=json.dumps({
+            'Version': '2012-10-17',
+            'Statement': [{'Effect': 'Allow', 'Action': 'ssm:GetParameter', 'Resource': parameter_arn}]
+        })
     )
-except ClientError as e:
-    print("❌ Failed to create security group:")
-    print(e.response['Error']['Message'])
+    try:
+        iam.create_instance_profile(InstanceProfileName=instance_profile_name)
+        iam.add_role_to_instance_profile(InstanceProfileName=instance_profile_name, RoleName=instance_role_name)
+        print(f"✅ Instance profile '{instance_profile_name}' created.")
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'EntityAlreadyExists':
+            raise
+        print(f"ℹ️ Instance profile '{instance_profile_name}' already exists.")
+    iam.get_waiter('instance_profile_exists').wait(InstanceProfileName=instance_profile_name)
+    return {'InstanceProfileName': instance_profile_name}
+
+
+journal.step('instance-profile', {'RoleName': instance_role_name, 'Parameter': cache_endpoint_parameter},
+             create_instance_profile,
+             verify=lambda out: iam.get_instance_profile(InstanceProfileName=out['InstanceProfileName']))
+
+# ---------------- Launch Template Profile ----------------
+# 'baseline', 'general' or 'io-heavy' (see launch_profiles.py): gp3 root volume,
+# EBS-optimized, detailed monitoring, IMDSv2, placement group and CPU credits
+launch_profile = 'baseline'
+allow_non_nitro = False  # profiles other than 'baseline' reject Xen types such as t2 unless this is set
+placement_group_name = f"{sanitized_name}-PG"
+
+# ---------------- Access Logs (optional) ----------------
+# Per-request latency for access_logs.py; the bucket and its delivery policy are created if needed
+enable_alb_access_logs = False
+access_log_bucket = 'company-alb-access-logs'
+access_log_prefix = 'app-tier'
 
 # ---------------- User Data ----------------
-user_data_script = '''#!/bin/bash
-yum update -y
-yum install -y httpd
-systemctl start httpd
-systemctl enable httpd
-cd /var/www/html
-echo "<h1>My Company Website</h1>" > index.html
-'''
-user_data_encoded = base64.b64encode(user_data_script.encode('utf-8')).decode('utf-8')
+# Tuned httpd profile (event MPM, keep-alive, compression, /health), see user_data.py
+# Part6 needs this tier's security group and always runs later, so a service polls the Redis
+# endpoint it exports (readable through the instance profile above) until it shows up
+user_data_script = render_user_data(extra_lines=[
+    "cat > /usr/local/bin/cache-endpoint <<'EOF'",
+    '#!/bin/bash',
+    f'until VALUE=$(aws ssm get-parameter --region us-east-1 --name {cache_endpoint_parameter} '
+    '--query Parameter.Value --output text 2>/dev/null); do',
+    '    sleep 60',
+    'done',
+    "sed -i '/^CACHE_ENDPOINT=/d' /etc/environment",
+    'echo "CACHE_ENDPOINT=$VALUE" >> /etc/environment',
+    'EOF',
+    'chmod +x /usr/local/bin/cache-endpoint',
+    "cat > /etc/systemd/system/cache-endpoint.service <<'EOF'",
+    '[Unit]',
+    'Description=Wait for the Redis endpoint exported by Part6',
+    'Wants=network-online.target',
+    'After=network-online.target',
+    '[Service]',
+    'Type=simple',
+    'ExecStart=/usr/local/bin/cache-endpoint',
+    '[Install]',
+    'WantedBy=multi-user.target',
+    'EOF',
+    'systemctl daemon-reload',
+    'systemctl enable --now cache-endpoint',
+])
+user_data_encoded = encode(user_data_script)
 
 # ---------------- Create Launch Template ----------------
-try:
-    response = ec2.create_launch_template(
-        LaunchTemplateName=launch_template_name,
-        VersionDescription='Application tier template',
-        LaunchTemplateData={
-            'ImageId': ami_id,
-            'InstanceType': instance_type,
-            'KeyName': key_name,
-            'SecurityGroupIds': security_group_ids,  # Correcting here by removing additional brackets
-            'UserData': user_data_encoded
-        }
-    )
-    print("✅ Launch template created successfully.")
-    print("Launch Template ID:", response['LaunchTemplate']['LaunchTemplateId'])
+launch_template_data = {
+    'ImageId': ami_id,
+    'InstanceType': instance_type,
+    'KeyName': key_name,
+    'SecurityGroupIds': security_group_ids,
+    'IamInstanceProfile': {'Name': instance_profile_name},
+    'UserData': user_data_encoded
+}
+launch_template_data = apply_profile(ec2, launch_template_data, launch_profile, placement_group_name,
+                                     allow_non_nitro)
 
-except ClientError as e:
-    if "already exists" in e.response['Error']['Message']:
-        print("ℹ️ Launch template already exists, proceeding...")
-    else:
-        print("❌ Failed to create launch template:")
-        print(e.response['Error']['Message'])
+
+def create_launch_template():
+    try:
+        response = ec2.create_launch_template(
+            LaunchTemplateName=launch_template_name,
+            VersionDescription='Application tier template',
+            LaunchTemplateData=launch_template_data
+        )
+        print("✅ Launch template created successfully.")
+        print("Launch Template ID:", response['LaunchTemplate']['LaunchTemplateId'])
+    except ClientError as e:
+        if "already exists" not in e.response['Error']['Message']:
+            raise
+        version, changes = template_changes(ec2, launch_template_name, launch_template_data)
+        if not changes:
+            print(f"ℹ️ Launch template already matches version {version}, proceeding...")
+            return {'LaunchTemplateName': launch_template_name}
+        print_changes(version, changes)
+        if rolling_deploy:
+            print("ℹ️ Launch template already exists, rolling out a new version...")
+            deployed = roll_out(ec2, autoscaling, launch_template_name, launch_template_data,
+                                asg_name, 'Application tier template', **refresh_preferences)
+            exit(0 if deployed else 1)
+        # Versions are only published by a deploy, the running fleet keeps the current one
+        print(f"⚠️ Launch template left at version {version}, enable rolling_deploy to publish the changes.")
+    return {'LaunchTemplateName': launch_template_name}
+
+
+journal.step('launch-template', launch_template_data, create_launch_template,
+             verify=lambda out: ec2.describe_launch_templates(LaunchTemplateNames=[out['LaunchTemplateName']]))
 
 # ---------------- Create Target Group ----------------
-try:
-    tg_response = elbv2.create_target_group(
-        Name=target_group_name,
-        Protocol='HTTP',
-        Port=80,
-        VpcId=vpc_id,
-        TargetType='instance',
-        HealthCheckProtocol='HTTP',
-        HealthCheckPort='80',
-        HealthCheckPath='/',
-        HealthCheckIntervalSeconds=30,
-        HealthCheckTimeoutSeconds=5,
-        HealthyThresholdCount=2,
-        UnhealthyThresholdCount=2,
-        Matcher={'HttpCode': '200'}
-    )
+def create_target_group():
+    try:
+        tg_response = elbv2.create_target_group(
+            Name=target_group_name,
+            Protocol='HTTP',
+            Port=80,
+            VpcId=vpc_id,
+            TargetType='instance',
+            HealthCheckProtocol='HTTP',
+            HealthCheckPort='80',
+            HealthCheckPath=HEALTH_CHECK_PATH,
+            HealthCheckIntervalSeconds=30,
+            HealthCheckTimeoutSeconds=5,
+            HealthyThresholdCount=2,
+            UnhealthyThresholdCount=2,
+            Matcher={'HttpCode': '200'}
+        )
+    except ClientError as e:
+        # ELBv2 returns the existing group when the settings match, so this one differs
+        if e.response['Error']['Code'] != 'DuplicateTargetGroupName':
+            raise
+        existing = elbv2.describe_target_groups(Names=[target_group_name])['TargetGroups'][0]
+        print(f"ℹ️ Target group '{target_group_name}' already exists with other settings, proceeding...")
+        return {'TargetGroupArn': existing['TargetGroupArn']}
     target_group_arn = tg_response['TargetGroups'][0]['TargetGroupArn']
     print("✅ Target group created:", target_group_arn)
-except ClientError as e:
-    print("❌ Failed to create target group:")
-    print(e.response['Error']['Message'])
-    target_group_arn = None
+    return {'TargetGroupArn': target_group_arn}
+
+
+target_group_arn = journal.step(
+    'target-group', {'Name': target_group_name, 'VpcId': vpc_id}, create_target_group,
+    verify=lambda out: elbv2.describe_target_groups(TargetGroupArns=[out['TargetGroupArn']])
+)['TargetGroupArn']
 
 # ---------------- Create Load Balancer ----------------
-try:
-    lb_response = elbv2.create_load_balancer(
-        Name=lb_name,
-        Subnets=subnet_ids,
-        Scheme='internet-facing',
-        Type='application',
-        IpAddressType='ipv4'
-    )
+def create_load_balancer():
+    try:
+        lb_response = elbv2.create_load_balancer(
+            Name=lb_name,
+            Subnets=subnet_ids,
+            Scheme='internet-facing',
+            Type='application',
+            IpAddressType='ipv4'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'DuplicateLoadBalancerName':
+            raise
+        print(f"ℹ️ Load balancer '{lb_name}' already exists, proceeding...")
+        lb_response = elbv2.describe_load_balancers(Names=[lb_name])
     lb_arn = lb_response['LoadBalancers'][0]['LoadBalancerArn']
-    lb_dns = lb_response['LoadBalancers'][0]['DNSName']
-    print("✅ Load balancer created:", lb_arn)
-except ClientError as e:
-    print("❌ Failed to create load balancer:")
-    print(e.response['Error']['Message'])
-    lb_arn = None
+    # httpd's KeepAliveTimeout is rendered just above this value
+    elbv2.modify_load_balancer_attributes(
+        LoadBalancerArn=lb_arn,
+        Attributes=[{'Key': 'idle_timeout.timeout_seconds', 'Value': str(ALB_IDLE_TIMEOUT)}]
+    )
+    print("✅ Load balancer ready:", lb_arn)
+    return {'LoadBalancerArn': lb_arn, 'DNSName': lb_response['LoadBalancers'][0]['DNSName']}
+
+
+load_balancer = journal.step(
+    'load-balancer', {'Name': lb_name, 'Subnets': subnet_ids}, create_load_balancer,
+    verify=lambda out: elbv2.describe_load_balancers(LoadBalancerArns=[out['LoadBalancerArn']])
+)
+lb_arn = load_balancer['LoadBalancerArn']
+lb_dns = load_balancer['DNSName']
 
 # ---------------- Create Listener ----------------
-if lb_arn and target_group_arn:
+def create_listener():
     try:
         listener_response = elbv2.create_listener(
             LoadBalancerArn=lb_arn,
@@ -150,53 +323,121 @@ if lb_arn and target_group_arn:
                 'TargetGroupArn': target_group_arn
             }]
         )
-        print("✅ Listener created on port 80.")
     except ClientError as e:
-        print("❌ Failed to create listener:")
-        print(e.response['Error']['Message'])
-else:
-    print("⚠️ Listener creation skipped due to previous errors.")
+        if e.response['Error']['Code'] != 'DuplicateListener':
+            raise
+        # Port 80 already forwards somewhere (e.g. to a blue/green colour), leave it as it is
+        listeners = elbv2.describe_listeners(LoadBalancerArn=lb_arn)['Listeners']
+        print("ℹ️ Listener on port 80 already exists, proceeding...")
+        return {'ListenerArn': next(l['ListenerArn'] for l in listeners if l['Port'] == 80)}
+    print("✅ Listener created on port 80.")
+    return {'ListenerArn': listener_response['Listeners'][0]['ListenerArn']}
+
+
+journal.step('listener', {'LoadBalancerArn': lb_arn, 'TargetGroupArn': target_group_arn}, create_listener,
+             verify=lambda out: elbv2.describe_listeners(ListenerArns=[out['ListenerArn']]))
+
+# ---------------- Enable Access Logs ----------------
+def access_logs_enabled(out):
+    attributes = elbv2.describe_load_balancer_attributes(LoadBalancerArn=lb_arn)['Attributes']
+    return {'Key': 'access_logs.s3.enabled', 'Value': 'true'} in attributes
+
+
+if enable_alb_access_logs:
+    journal.step('access-logs', {'LoadBalancerArn': lb_arn, 'Bucket': access_log_bucket, 'Prefix': access_log_prefix},
+                 lambda: enable_access_logs(session, lb_arn, access_log_bucket, access_log_prefix) or {},
+                 verify=access_logs_enabled)
 
 # ---------------- Create Auto Scaling Group ----------------
-try:
-    asg_response = autoscaling.create_auto_scaling_group(
-        AutoScalingGroupName=asg_name,
-        LaunchTemplate={
-            'LaunchTemplateName': launch_template_name,
-            'Version': '$Latest'
+launch_template_spec = {
+    'LaunchTemplateName': launch_template_name,
+    'Version': '$Default'
+}
+if use_mixed_instances:
+    overrides = instance_type_overrides or select_instance_types(ec2, subnet_ids=subnet_ids)
+    if not overrides:
+        print(f"⚠️ No candidate instance type is offered in every AZ of the subnets, using {instance_type} only.")
+        overrides = [instance_type]
+    print("🧮 Instance types for the mixed instances policy:", ", ".join(overrides))
+    launch_config = {'MixedInstancesPolicy': {
+        'LaunchTemplate': {
+            'LaunchTemplateSpecification': launch_template_spec,
+            'Overrides': [{'InstanceType': t} for t in overrides]
         },
-        MinSize=2,
-        MaxSize=3,
-        DesiredCapacity=2,
-        VPCZoneIdentifier=",".join(subnet_ids),
-        TargetGroupARNs=[target_group_arn],
-        HealthCheckType="ELB",
-        HealthCheckGracePeriod=300,
-        NewInstancesProtectedFromScaleIn=False,
-        Tags=[{
-            'Key': 'Name',
-            'Value': 'Application-ASG-Instance',
-            'PropagateAtLaunch': True
-        }]
-    )
+        'InstancesDistribution': {
+            'OnDemandAllocationStrategy': 'prioritized',
+            'OnDemandBaseCapacity': on_demand_base_capacity,
+            'OnDemandPercentageAboveBaseCapacity': on_demand_percentage_above_base,
+            'SpotAllocationStrategy': spot_allocation_strategy
+        }
+    }}
+else:
+    launch_config = {'LaunchTemplate': launch_template_spec}
+
+
+def create_auto_scaling_group():
+    try:
+        autoscaling.create_auto_scaling_group(
+            AutoScalingGroupName=asg_name,
+            **launch_config,
+            MinSize=2,
+            MaxSize=3,
+            DesiredCapacity=2,
+            VPCZoneIdentifier=",".join(subnet_ids),
+            TargetGroupARNs=[target_group_arn],
+            HealthCheckType="ELB",
+            HealthCheckGracePeriod=300,
+            NewInstancesProtectedFromScaleIn=False,
+            Tags=[
+                {
+                    'Key': 'Name',
+                    'Value': 'Application-ASG-Instance',
+                    'PropagateAtLaunch': True
+                }
+            ]
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'AlreadyExists':
+            raise
+        print(f"ℹ️ Auto Scaling Group '{asg_name}' already exists, proceeding...")
+        return {'AutoScalingGroupName': asg_name}
     print("✅ Auto Scaling Group created:", asg_name)
-except ClientError as e:
-    print("❌ Failed to create Auto Scaling Group:")
-    print(e.response['Error']['Message'])
+    return {'AutoScalingGroupName': asg_name}
+
+
+journal.step(
+    'auto-scaling-group', {'Name': asg_name, 'TargetGroupArn': target_group_arn, **launch_config},
+    create_auto_scaling_group,
+    verify=lambda out: autoscaling.describe_auto_scaling_groups(
+        AutoScalingGroupNames=[out['AutoScalingGroupName']])['AutoScalingGroups']
+)
 
 # ---------------- Enable CloudWatch Group Metrics ----------------
-try:
+group_metrics = ['GroupMinSize', 'GroupMaxSize', 'GroupDesiredCapacity']
+
+
+def enable_metrics_collection():
     autoscaling.enable_metrics_collection(
         AutoScalingGroupName=asg_name,
         Granularity='1Minute',
-        Metrics=['GroupMinSize', 'GroupMaxSize', 'GroupDesiredCapacity']
+        Metrics=group_metrics
     )
     print("📊 CloudWatch group metrics collection enabled.")
-except ClientError as e:
-    print("⚠️ Failed to enable CloudWatch metrics:", e.response['Error']['Message'])
+    return {'AutoScalingGroupName': asg_name, 'Metrics': group_metrics}
+
+
+def metrics_enabled(out):
+    groups = autoscaling.describe_auto_scaling_groups(
+        AutoScalingGroupNames=[out['AutoScalingGroupName']])['AutoScalingGroups']
+    enabled = {m['Metric'] for group in groups for m in group.get('EnabledMetrics', [])}
+    return bool(groups) and set(out['Metrics']) <= enabled
+
+
+journal.step('metrics-collection', {'AutoScalingGroupName': asg_name, 'Metrics': group_metrics},
+             enable_metrics_collection, verify=metrics_enabled)
 
 # ---------------- Create Scaling Policy ----------------
-try:
+def create_scaling_policy():
     policy_response = autoscaling.put_scaling_policy(
         AutoScalingGroupName=asg_name,
         PolicyName="TargetTrackingPolicy",
@@ -211,8 +452,12 @@ try:
         EstimatedInstanceWarmup=300
     )
     print("📈 Target tracking scaling policy created.")
-except ClientError as e:
-    print("⚠️ Failed to create scaling policy:", e.response['Error']['Message'])
+    return {'PolicyARN': policy_response['PolicyARN']}
+
+
+journal.step('scaling-policy', {'AutoScalingGroupName': asg_name}, create_scaling_policy,
+             verify=lambda out: autoscaling.describe_policies(
+                 AutoScalingGroupName=asg_name, PolicyNames=['TargetTrackingPolicy'])['ScalingPolicies'])
 
 # ---------------- Output ALB DNS Name ----------------
 if lb_dns:
@@ -1,5 +1,7 @@
+import sys
 import boto3
 from botocore.exceptions import ClientError
+from inventory import Inventory, SECURITY_GROUP
 
 # ---------------- AWS Session Setup ----------------
 session = boto3.session.Session(profile_name="boto3-user", region_name="us-east-1")
@@ -27,6 +29,87 @@ engine = 'mysql'
 engine_version = '8.4.6'  # valid MySQL engine version for RDS
 allocated_storage = 20  # GB
 
+# ---------------- Storage & Observability Profile ----------------
+# Pick one of the STORAGE_PROFILES below. gp2 gets 3 IOPS per GB (100 IOPS floor),
+# so the original 20 GB volume throttles on IOPS long before the CPU is busy.
+storage_profile = 'gp3'
+
+STORAGE_PROFILES = {
+    # Original setup: 20 GB gp2, 100 IOPS baseline (bursts to 3000 on credits)
+    'gp2': {'StorageType': 'gp2', 'AllocatedStorage': allocated_storage},
+    # gp3 below 400 GB: fixed 3000 IOPS / 125 MiB/s baseline, no burst credits
+    'gp3': {'StorageType': 'gp3', 'AllocatedStorage': allocated_storage, 'MaxAllocatedStorage': 100},
+    # gp3 from 400 GB up: IOPS and throughput can be provisioned explicitly
+    'gp3-provisioned': {'StorageType': 'gp3', 'AllocatedStorage': 400, 'MaxAllocatedStorage': 1000,
+                        'Iops': 12000, 'StorageThroughput': 500},
+    # io2: provisioned IOPS, 100 GB minimum on RDS
+    'io2': {'StorageType': 'io2', 'AllocatedStorage': 100, 'MaxAllocatedStorage': 500, 'Iops': 5000},
+}
+
+multi_az = False
+performance_insights = False
+performance_insights_retention = 7  # days (7 is the free tier)
+enhanced_monitoring_interval = 0  # seconds: 0 disables, otherwise 1, 5, 10, 15, 30 or 60
+monitoring_role_arn = ''  # IAM role trusted by monitoring.rds.amazonaws.com, needed when interval > 0
+
+
+# Baseline IOPS / throughput (MiB/s) a storage profile gives on RDS
+def storage_baseline(profile):
+    storage_type = profile['StorageType']
+    size = profile['AllocatedStorage']
+    if storage_type == 'gp2':
+        iops = min(max(3 * size, 100), 16000)
+        throughput = 128 if size <= 170 else 250
+    elif storage_type == 'gp3':
+        if 'Iops' in profile:
+            iops = profile['Iops']
+            throughput = profile.get('StorageThroughput', 500)
+        elif size < 400:
+            iops, throughput = 3000, 125
+        else:
+            iops, throughput = 12000, 500
+    else:
+        iops = profile['Iops']
+        throughput = min(iops // 4, 4000)  # 256 KiB per I/O
+    return iops, throughput
+
+
+def print_storage_report():
+    print(f"{'Profile':<18}{'Type':<6}{'Size GB':>8}{'Max GB':>8}{'IOPS':>8}{'MiB/s':>8}")
+    for name, profile in STORAGE_PROFILES.items():
+        iops, throughput = storage_baseline(profile)
+        marker = ' <- selected' if name == storage_profile else ''
+        print(f"{name:<18}{profile['StorageType']:<6}{profile['AllocatedStorage']:>8}"
+              f"{profile.get('MaxAllocatedStorage', '-'):>8}{iops:>8}{throughput:>8}{marker}")
+    print(f"Multi-AZ: {multi_az} | Performance Insights: {performance_insights} | "
+          f"Enhanced Monitoring: {enhanced_monitoring_interval or 'off'}")
+
+
+if storage_profile not in STORAGE_PROFILES:
+    print(f"❌ Unknown storage profile '{storage_profile}', choose one of: {', '.join(STORAGE_PROFILES)}")
+    exit(1)
+
+print("💾 Storage profiles:")
+print_storage_report()
+if '--report' in sys.argv:
+    exit(0)
+
+if enhanced_monitoring_interval and not monitoring_role_arn:
+    print("❌ Enhanced Monitoring needs monitoring_role_arn to be set.")
+    exit(1)
+if performance_insights and db_instance_class in ('db.t3.micro', 'db.t3.small'):
+    print(f"⚠️ Performance Insights is not supported on {db_instance_class} for MySQL, it will be skipped.")
+    performance_insights = False
+
+# Optional create_db_instance arguments for the selected profile
+db_instance_options = dict(STORAGE_PROFILES[storage_profile])
+if performance_insights:
+    db_instance_options['EnablePerformanceInsights'] = True
+    db_instance_options['PerformanceInsightsRetentionPeriod'] = performance_insights_retention
+if enhanced_monitoring_interval:
+    db_instance_options['MonitoringInterval'] = enhanced_monitoring_interval
+    db_instance_options['MonitoringRoleArn'] = monitoring_role_arn
+
 # ---------------- Create DB Subnet Group ----------------
 try:
     rds.create_db_subnet_group(
@@ -42,6 +125,10 @@ except ClientError as e:
         print("❌ Failed to create DB Subnet Group:", e.response['Error']['Message'])
         exit(1)
 
+# ---------------- Inventory ----------------
+# Security groups are only scanned once a lookup is needed, a clean create needs none
+inventory = Inventory(session)
+
 # ---------------- Create DB Security Group ----------------
 try:
     sg_response = ec2.create_security_group(
@@ -54,13 +141,11 @@ try:
 except ClientError as e:
     if "InvalidGroup.Duplicate" in e.response['Error']['Code']:
         print(f"ℹ️ Security group '{db_sg_name}' already exists. Fetching ID...")
-        sg_existing = ec2.describe_security_groups(
-            Filters=[
-                {'Name': 'group-name', 'Values': [db_sg_name]},
-                {'Name': 'vpc-id', 'Values': [vpc_id]}
-            ]
-        )
-        db_sg_id = sg_existing['SecurityGroups'][0]['GroupId']
+        db_sg = inventory.ensure([SECURITY_GROUP]).get(SECURITY_GROUP, db_sg_name, vpc_id=vpc_id)
+        if not db_sg:
+            print(f"❌ Security group '{db_sg_name}' exists but was not found in {vpc_id}.")
+            exit(1)
+        db_sg_id = db_sg['id']
         print(f"✅ Found existing security group {db_sg_name} with ID {db_sg_id}")
     else:
         print("❌ Failed to create or get security group:", e.response['Error']['Message'])
@@ -78,13 +163,11 @@ try:
 except ClientError as e:
     if "InvalidGroup.Duplicate" in e.response['Error']['Code']:
         print(f"ℹ️ Security group '{app_sg_name}' already exists. Fetching ID...")
-        sg_existing = ec2.describe_security_groups(
-            Filters=[
-                {'Name': 'group-name', 'Values': [app_sg_name]},
-                {'Name': 'vpc-id', 'Values': [vpc_id]}
-            ]
-        )
-        app_sg_id = sg_existing['SecurityGroups'][0]['GroupId']
+        app_sg = inventory.ensure([SECURITY_GROUP]).get(SECURITY_GROUP, app_sg_name, vpc_id=vpc_id)
+        if not app_sg:
+            print(f"❌ Security group '{app_sg_name}' exists but was not found in {vpc_id}.")
+            exit(1)
+        app_sg_id = app_sg['id']
         print(f"✅ Found existing security group {app_sg_name} with ID {app_sg_id}")
     else:
         print("❌ Failed to create or get app security group:", e.response['Error']['Message'])
@@ -115,7 +198,6 @@ try:
     rds.create_db_instance(
         DBName=db_name,
         DBInstanceIdentifier=db_identifier,
-        AllocatedStorage=allocated_storage,
         DBInstanceClass=db_instance_class,
         Engine=engine,
         EngineVersion=engine_version,
@@ -125,13 +207,13 @@ try:
         DBSubnetGroupName=db_subnet_group_name,
         PubliclyAccessible=False,
         BackupRetentionPeriod=7,
-        MultiAZ=False,
-        StorageType='gp2',
+        MultiAZ=multi_az,
         Tags=[
             {'Key': 'Name', 'Value': 'DataTierDB'}
-        ]
+        ],
+        **db_instance_options
     )
-    print(f"✅ RDS MySQL instance '{db_identifier}' creation started.")
+    print(f"✅ RDS MySQL instance '{db_identifier}' creation started ({storage_profile} profile).")
 except ClientError as e:
     if "DBInstanceAlreadyExists" in e.response['Error']['Code']:
         print(f"ℹ️ RDS instance '{db_identifier}' already exists.")
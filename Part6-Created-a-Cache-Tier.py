@@ -0,0 +1,174 @@
+import boto3
+from botocore.exceptions import ClientError, WaiterError
+from inventory import Inventory, SECURITY_GROUP
+
+# ---------------- AWS Session Setup ----------------
+session = boto3.session.Session(profile_name="boto3-user", region_name="us-east-1")
+elasticache = session.client('elasticache')
+ec2 = session.client('ec2')
+ssm = session.client('ssm')
+
+# ---------------- Parameters ----------------
+vpc_id = 'vpc-03225bf494db6ecc2'
+
+# Cache subnet group (same private subnets as the database tier)
+subnet_ids = ['subnet-079fe0a7a068f58fe', 'subnet-045f95cf0c41e11ad']
+cache_subnet_group_name = 'cache-tier-subnet-group'
+
+# Security group names
+cache_sg_name = 'CacheTierSG'
+app_sg_name = 'Application-Tier-SG'  # Only the application tier may reach Redis
+
+# Redis replication group parameters
+replication_group_id = 'cachetier-redis'
+cache_node_type = 'cache.t3.micro'
+engine_version = '7.1'
+redis_port = 6379
+cluster_mode = False  # True: shard the keyspace across num_node_groups shards
+num_node_groups = 2  # only used when cluster_mode is True
+replicas_per_node_group = 1  # read replicas per shard (>= 1 enables automatic failover)
+
+# The app tier reads the endpoint from this SSM parameter
+endpoint_parameter_name = '/company/cache-tier/endpoint'
+
+# ---------------- Create Cache Subnet Group ----------------
+try:
+    elasticache.create_cache_subnet_group(
+        CacheSubnetGroupName=cache_subnet_group_name,
+        CacheSubnetGroupDescription='Private subnet group for ElastiCache Redis',
+        SubnetIds=subnet_ids
+    )
+    print(f"✅ Cache subnet group created: {cache_subnet_group_name}")
+except ClientError as e:
+    if "CacheSubnetGroupAlreadyExists" in e.response['Error']['Code']:
+        print(f"ℹ️ Cache subnet group {cache_subnet_group_name} already exists.")
+    else:
+        print("❌ Failed to create cache subnet group:", e.response['Error']['Message'])
+        exit(1)
+
+# ---------------- Inventory ----------------
+# Security groups are only scanned once a lookup is needed, a clean create needs none
+inventory = Inventory(session)
+
+# ---------------- Create Cache Security Group ----------------
+try:
+    sg_response = ec2.create_security_group(
+        GroupName=cache_sg_name,
+        Description='Allows Redis access to cache tier',
+        VpcId=vpc_id
+    )
+    cache_sg_id = sg_response['GroupId']
+    print(f"✅ Security group created: {cache_sg_name} with ID {cache_sg_id}")
+except ClientError as e:
+    if "InvalidGroup.Duplicate" in e.response['Error']['Code']:
+        print(f"ℹ️ Security group '{cache_sg_name}' already exists. Fetching ID...")
+        cache_sg = inventory.ensure([SECURITY_GROUP]).get(SECURITY_GROUP, cache_sg_name, vpc_id=vpc_id)
+        if not cache_sg:
+            print(f"❌ Security group '{cache_sg_name}' exists but was not found in {vpc_id}.")
+            exit(1)
+        cache_sg_id = cache_sg['id']
+        print(f"✅ Found existing security group {cache_sg_name} with ID {cache_sg_id}")
+    else:
+        print("❌ Failed to create or get security group:", e.response['Error']['Message'])
+        exit(1)
+
+# ---------------- Look up App Security Group ----------------
+app_sg = inventory.ensure([SECURITY_GROUP]).get(SECURITY_GROUP, app_sg_name, vpc_id=vpc_id)
+if not app_sg:
+    print(f"❌ Application security group '{app_sg_name}' not found, run Part-4 first.")
+    exit(1)
+app_sg_id = app_sg['id']
+
+# ---------------- Add inbound rule: Allow Redis from App SG to Cache SG ----------------
+try:
+    ec2.authorize_security_group_ingress(
+        GroupId=cache_sg_id,
+        IpPermissions=[
+            {
+                'IpProtocol': 'tcp',
+                'FromPort': redis_port,
+                'ToPort': redis_port,
+                'UserIdGroupPairs': [{'GroupId': app_sg_id}]
+            }
+        ]
+    )
+    print(f"🔐 Inbound rule added: Allow Redis ({redis_port}) from App SG to Cache SG")
+except ClientError as e:
+    if 'InvalidPermission.Duplicate' in e.response['Error']['Code']:
+        print("ℹ️ Inbound rule already exists.")
+    else:
+        print("❌ Failed to add inbound rule:", e.response['Error']['Message'])
+
+# ---------------- Create Redis Replication Group ----------------
+if cluster_mode:
+    topology = {
+        'CacheParameterGroupName': 'default.redis7.cluster.on',
+        'NumNodeGroups': num_node_groups,
+        'ReplicasPerNodeGroup': replicas_per_node_group,
+    }
+else:
+    topology = {
+        'CacheParameterGroupName': 'default.redis7',
+        'NumCacheClusters': 1 + replicas_per_node_group,
+    }
+
+try:
+    elasticache.create_replication_group(
+        ReplicationGroupId=replication_group_id,
+        ReplicationGroupDescription='Redis cache between the app and database tiers',
+        Engine='redis',
+        EngineVersion=engine_version,
+        CacheNodeType=cache_node_type,
+        Port=redis_port,
+        CacheSubnetGroupName=cache_subnet_group_name,
+        SecurityGroupIds=[cache_sg_id],
+        AutomaticFailoverEnabled=cluster_mode or replicas_per_node_group > 0,
+        MultiAZEnabled=replicas_per_node_group > 0,
+        TransitEncryptionEnabled=False,
+        Tags=[
+            {'Key': 'Name', 'Value': 'CacheTierRedis'}
+        ],
+        **topology
+    )
+    print(f"✅ Redis replication group '{replication_group_id}' creation started.")
+except ClientError as e:
+    if "ReplicationGroupAlreadyExists" in e.response['Error']['Code']:
+        print(f"ℹ️ Replication group '{replication_group_id}' already exists.")
+    else:
+        print("❌ Failed to create replication group:", e.response['Error']['Message'])
+        exit(1)
+
+# ---------------- Wait for the cache to become available ----------------
+print("⏳ Waiting for the Redis replication group to become available...")
+waiter = elasticache.get_waiter('replication_group_available')
+try:
+    waiter.wait(ReplicationGroupId=replication_group_id)
+except ClientError as e:
+    print("❌ Error while waiting for the replication group:", e.response['Error']['Message'])
+    exit(1)
+except WaiterError as e:
+    print("❌ Replication group did not become available:", e)
+    exit(1)
+
+group = elasticache.describe_replication_groups(
+    ReplicationGroupId=replication_group_id
+)['ReplicationGroups'][0]
+if cluster_mode:
+    endpoint = group['ConfigurationEndpoint']
+else:
+    endpoint = group['NodeGroups'][0]['PrimaryEndpoint']
+cache_endpoint = f"{endpoint['Address']}:{endpoint['Port']}"
+print(f"✅ Redis endpoint: {cache_endpoint}")
+
+# ---------------- Export endpoint to the App Tier ----------------
+try:
+    ssm.put_parameter(
+        Name=endpoint_parameter_name,
+        Description='Redis endpoint for the application tier',
+        Value=cache_endpoint,
+        Type='String',
+        Overwrite=True
+    )
+    print(f"📤 Endpoint exported to SSM parameter '{endpoint_parameter_name}'")
+except ClientError as e:
+    print("⚠️ Failed to export cache endpoint:", e.response['Error']['Message'])
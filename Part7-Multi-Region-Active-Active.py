@@ -0,0 +1,290 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+from botocore.exceptions import ClientError, WaiterError
+from user_data import ALB_IDLE_TIMEOUT, HEALTH_CHECK_PATH, encode, render_user_data
+
+# ---------------- AWS Session ----------------
+# One session per region is created inside each worker thread (sessions are not thread-safe)
+PROFILE_NAME = "boto3-user"
+
+# ---------------- CONFIG ----------------
+STACK_NAME = "company-web"
+REGIONS = ["us-east-1", "eu-west-1", "ap-southeast-1"]
+AZ_COUNT = 2  # Availability Zones used per region
+
+VPC_CIDR = "10.0.0.0/16"
+PUBLIC_SUBNET_CIDRS = ["10.0.0.0/20", "10.0.16.0/20", "10.0.32.0/20"]  # one per AZ
+
+# Resolved per region, so every region gets its own current Amazon Linux 2 image
+AMI_PARAMETER = "/aws/service/ami-amazon-linux-latest/amzn2-ami-hvm-x86_64-gp2"
+INSTANCE_TYPE = "t3.micro"
+KEY_PAIR_NAME = None  # key pairs are regional, set only if the key exists in every region
+
+# Route 53 latency-based routing
+HOSTED_ZONE_ID = "Z0000000000000000000"  # public hosted zone that owns RECORD_NAME
+RECORD_NAME = "www.example.com"
+
+# Tuned httpd profile from user_data.py; the page also names the region that served it
+USER_DATA = render_user_data(extra_lines=[
+    'TOKEN=$(curl -s -X PUT http://169.254.169.254/latest/api/token -H "X-aws-ec2-metadata-token-ttl-seconds: 60")',
+    'REGION=$(curl -s -H "X-aws-ec2-metadata-token: $TOKEN" http://169.254.169.254/latest/meta-data/placement/region)',
+    'echo "<h1>My Company Website</h1><p>Served from $REGION</p>" > index.html',
+])
+
+
+# ---------------- FUNCTIONS ----------------
+def log(region, message):
+    print(f"[{region}] {message}")
+
+
+def tags(name):
+    return [{"Key": "Name", "Value": name}, {"Key": "Stack", "Value": STACK_NAME}]
+
+
+def tag_filters(name):
+    return [{"Name": "tag:Name", "Values": [name]}, {"Name": "tag:Stack", "Values": [STACK_NAME]}]
+
+
+def discover_azs(ec2):
+    zones = ec2.describe_availability_zones(
+        Filters=[{"Name": "state", "Values": ["available"]}, {"Name": "zone-type", "Values": ["availability-zone"]}]
+    )["AvailabilityZones"]
+    return sorted(z["ZoneName"] for z in zones)[:AZ_COUNT]
+
+
+def lookup_ami(ssm):
+    return ssm.get_parameter(Name=AMI_PARAMETER)["Parameter"]["Value"]
+
+
+def create_network(ec2, region, azs):
+    # A run that failed after the network was built reuses the tagged resources
+    vpcs = ec2.describe_vpcs(Filters=tag_filters(f"{STACK_NAME}-vpc"))["Vpcs"]
+    if vpcs:
+        vpc_id = vpcs[0]["VpcId"]
+        log(region, f"ℹ️ Reusing VPC {vpc_id}")
+    else:
+        vpc_id = ec2.create_vpc(
+            CidrBlock=VPC_CIDR,
+            TagSpecifications=[{"ResourceType": "vpc", "Tags": tags(f"{STACK_NAME}-vpc")}]
+        )["Vpc"]["VpcId"]
+        ec2.get_waiter("vpc_available").wait(VpcIds=[vpc_id])
+        ec2.modify_vpc_attribute(VpcId=vpc_id, EnableDnsHostnames={"Value": True})
+    in_vpc = {"Name": "vpc-id", "Values": [vpc_id]}
+
+    igws = ec2.describe_internet_gateways(
+        Filters=[{"Name": "attachment.vpc-id", "Values": [vpc_id]}]
+    )["InternetGateways"]
+    if igws:
+        igw_id = igws[0]["InternetGatewayId"]
+    else:
+        igw_id = ec2.create_internet_gateway(
+            TagSpecifications=[{"ResourceType": "internet-gateway", "Tags": tags(f"{STACK_NAME}-igw")}]
+        )["InternetGateway"]["InternetGatewayId"]
+        ec2.attach_internet_gateway(VpcId=vpc_id, InternetGatewayId=igw_id)
+
+    rtbs = ec2.describe_route_tables(Filters=[in_vpc, *tag_filters(f"{STACK_NAME}-rtb-public")])["RouteTables"]
+    if rtbs:
+        rtb_id = rtbs[0]["RouteTableId"]
+    else:
+        rtb_id = ec2.create_route_table(
+            VpcId=vpc_id,
+            TagSpecifications=[{"ResourceType": "route-table", "Tags": tags(f"{STACK_NAME}-rtb-public")}]
+        )["RouteTable"]["RouteTableId"]
+        ec2.create_route(RouteTableId=rtb_id, DestinationCidrBlock="0.0.0.0/0", GatewayId=igw_id)
+
+    existing = {s["AvailabilityZone"]: s["SubnetId"] for s in ec2.describe_subnets(Filters=[in_vpc])["Subnets"]}
+    subnet_ids = []
+    for az, cidr in zip(azs, PUBLIC_SUBNET_CIDRS):
+        if az in existing:
+            subnet_ids.append(existing[az])
+            continue
+        subnet_id = ec2.create_subnet(
+            VpcId=vpc_id, CidrBlock=cidr, AvailabilityZone=az,
+            TagSpecifications=[{"ResourceType": "subnet", "Tags": tags(f"{STACK_NAME}-subnet-public-{az}")}]
+        )["Subnet"]["SubnetId"]
+        ec2.modify_subnet_attribute(SubnetId=subnet_id, MapPublicIpOnLaunch={"Value": True})
+        ec2.associate_route_table(SubnetId=subnet_id, RouteTableId=rtb_id)
+        subnet_ids.append(subnet_id)
+    log(region, f"✅ Network ready: {vpc_id} with subnets in {', '.join(azs)}")
+    return vpc_id, subnet_ids
+
+
+def create_web_security_group(ec2, vpc_id):
+    groups = ec2.describe_security_groups(Filters=[
+        {"Name": "vpc-id", "Values": [vpc_id]}, {"Name": "group-name", "Values": [f"{STACK_NAME}-web-sg"]}
+    ])["SecurityGroups"]
+    if groups:
+        return groups[0]["GroupId"]
+    sg_id = ec2.create_security_group(
+        GroupName=f"{STACK_NAME}-web-sg",
+        Description="Web tier security group",
+        VpcId=vpc_id,
+        TagSpecifications=[{"ResourceType": "security-group", "Tags": tags(f"{STACK_NAME}-web-sg")}]
+    )["GroupId"]
+    ec2.authorize_security_group_ingress(
+        GroupId=sg_id,
+        IpPermissions=[{"IpProtocol": "tcp", "FromPort": 80, "ToPort": 80, "IpRanges": [{"CidrIp": "0.0.0.0/0"}]}]
+    )
+    return sg_id
+
+
+def create_web_tier(session, region, vpc_id, subnet_ids, sg_id, ami_id):
+    ec2 = session.client("ec2")
+    elbv2 = session.client("elbv2")
+    autoscaling = session.client("autoscaling")
+
+    template_data = {
+        "ImageId": ami_id,
+        "InstanceType": INSTANCE_TYPE,
+        "SecurityGroupIds": [sg_id],
+        "UserData": encode(USER_DATA),
+    }
+    if KEY_PAIR_NAME:
+        template_data["KeyName"] = KEY_PAIR_NAME
+    try:
+        ec2.create_launch_template(LaunchTemplateName=f"{STACK_NAME}-web", LaunchTemplateData=template_data)
+    except ClientError as e:
+        if "already exists" not in e.response["Error"]["Message"]:
+            raise
+
+    tg_arn = elbv2.create_target_group(
+        Name=f"{STACK_NAME}-web-tg", Protocol="HTTP", Port=80, VpcId=vpc_id, TargetType="instance",
+        HealthCheckPath=HEALTH_CHECK_PATH, HealthCheckIntervalSeconds=15, HealthyThresholdCount=2,
+        Tags=tags(f"{STACK_NAME}-web-tg")
+    )["TargetGroups"][0]["TargetGroupArn"]
+    lb = elbv2.create_load_balancer(
+        Name=f"{STACK_NAME}-web-lb", Subnets=subnet_ids, SecurityGroups=[sg_id],
+        Scheme="internet-facing", Type="application", IpAddressType="ipv4", Tags=tags(f"{STACK_NAME}-web-lb")
+    )["LoadBalancers"][0]
+    # Same idle timeout as Part-3/Part-4, httpd's KeepAliveTimeout is rendered just above it
+    elbv2.modify_load_balancer_attributes(
+        LoadBalancerArn=lb["LoadBalancerArn"],
+        Attributes=[{"Key": "idle_timeout.timeout_seconds", "Value": str(ALB_IDLE_TIMEOUT)}]
+    )
+    elbv2.create_listener(
+        LoadBalancerArn=lb["LoadBalancerArn"], Protocol="HTTP", Port=80,
+        DefaultActions=[{"Type": "forward", "TargetGroupArn": tg_arn}]
+    )
+
+    autoscaling.create_auto_scaling_group(
+        AutoScalingGroupName=f"{STACK_NAME}-web-asg",
+        LaunchTemplate={"LaunchTemplateName": f"{STACK_NAME}-web", "Version": "$Default"},
+        MinSize=2, MaxSize=3, DesiredCapacity=2,
+        VPCZoneIdentifier=",".join(subnet_ids),
+        TargetGroupARNs=[tg_arn],
+        HealthCheckType="ELB", HealthCheckGracePeriod=300,
+        Tags=[{**t, "PropagateAtLaunch": True} for t in tags(f"{STACK_NAME}-web")]
+    )
+    autoscaling.put_scaling_policy(
+        AutoScalingGroupName=f"{STACK_NAME}-web-asg",
+        PolicyName="TargetTrackingPolicy",
+        PolicyType="TargetTrackingScaling",
+        TargetTrackingConfiguration={
+            "PredefinedMetricSpecification": {"PredefinedMetricType": "ASGAverageCPUUtilization"},
+            "TargetValue": 50.0
+        },
+        EstimatedInstanceWarmup=300
+    )
+
+    elbv2.get_waiter("load_balancer_available").wait(LoadBalancerArns=[lb["LoadBalancerArn"]])
+    log(region, f"✅ Web tier ready behind {lb['DNSName']}")
+    return lb
+
+
+def existing_endpoint(session, region):
+    # Regions deployed by an earlier run are only re-registered in Route 53
+    try:
+        lb = session.client("elbv2").describe_load_balancers(Names=[f"{STACK_NAME}-web-lb"])["LoadBalancers"][0]
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "LoadBalancerNotFound":
+            return None
+        raise
+    log(region, f"ℹ️ Already deployed behind {lb['DNSName']}, skipping.")
+    return lb
+
+
+def deploy_region(region):
+    session = boto3.session.Session(profile_name=PROFILE_NAME, region_name=region)
+    lb = existing_endpoint(session, region)
+    if lb:
+        return {"region": region, "dns_name": lb["DNSName"], "zone_id": lb["CanonicalHostedZoneId"]}
+
+    ec2 = session.client("ec2")
+    azs = discover_azs(ec2)
+    ami_id = lookup_ami(session.client("ssm"))
+    log(region, f"🔎 AZs {', '.join(azs)}, AMI {ami_id}")
+
+    vpc_id, subnet_ids = create_network(ec2, region, azs)
+    sg_id = create_web_security_group(ec2, vpc_id)
+    lb = create_web_tier(session, region, vpc_id, subnet_ids, sg_id, ami_id)
+    return {"region": region, "dns_name": lb["DNSName"], "zone_id": lb["CanonicalHostedZoneId"]}
+
+
+# ---------------- Route 53 ----------------
+def create_health_check(route53, endpoint):
+    # Same ALB -> same CallerReference, so reruns return the existing health check
+    alb_hash = hashlib.sha1(endpoint["dns_name"].encode("utf-8")).hexdigest()[:12]
+    return route53.create_health_check(
+        CallerReference=f"{STACK_NAME}-{endpoint['region']}-{alb_hash}",
+        HealthCheckConfig={
+            "Type": "HTTP",
+            "FullyQualifiedDomainName": endpoint["dns_name"],
+            "Port": 80,
+            "ResourcePath": HEALTH_CHECK_PATH,
+            "RequestInterval": 10,
+            "FailureThreshold": 3,
+            "MeasureLatency": True
+        }
+    )["HealthCheck"]["Id"]
+
+
+def register_latency_records(route53, endpoints):
+    changes = []
+    for endpoint in endpoints:
+        health_check_id = create_health_check(route53, endpoint)
+        changes.append({
+            "Action": "UPSERT",
+            "ResourceRecordSet": {
+                "Name": RECORD_NAME,
+                "Type": "A",
+                "SetIdentifier": endpoint["region"],
+                "Region": endpoint["region"],
+                "HealthCheckId": health_check_id,
+                "AliasTarget": {
+                    "HostedZoneId": endpoint["zone_id"],
+                    "DNSName": endpoint["dns_name"],
+                    "EvaluateTargetHealth": True
+                }
+            }
+        })
+    change_id = route53.change_resource_record_sets(
+        HostedZoneId=HOSTED_ZONE_ID,
+        ChangeBatch={"Comment": f"{STACK_NAME} latency routing", "Changes": changes}
+    )["ChangeInfo"]["Id"]
+    route53.get_waiter("resource_record_sets_changed").wait(Id=change_id)
+    print(f"✅ Latency records for {RECORD_NAME} in sync across {len(changes)} region(s)")
+
+
+# ---------------- MAIN ----------------
+if __name__ == "__main__":
+    # Regions are independent, so they are built at the same time
+    endpoints = []
+    with ThreadPoolExecutor(max_workers=len(REGIONS)) as pool:
+        futures = {region: pool.submit(deploy_region, region) for region in REGIONS}
+        for region, future in futures.items():
+            try:
+                endpoints.append(future.result())
+            except (ClientError, WaiterError) as e:
+                message = e.response['Error']['Message'] if isinstance(e, ClientError) else str(e)
+                log(region, f"❌ Deployment failed: {message}")
+
+    if not endpoints:
+        print("❌ No region was deployed, Route 53 left untouched.")
+        exit(1)
+
+    route53 = boto3.session.Session(profile_name=PROFILE_NAME).client("route53")
+    register_latency_records(route53, endpoints)
+    print(f"\n🌐 http://{RECORD_NAME} now routes each user to the closest healthy region:")
+    for endpoint in endpoints:
+        print(f"   {endpoint['region']}: http://{endpoint['dns_name']}")
@@ -0,0 +1,261 @@
+import argparse
+import gzip
+import io
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+# ---------------- ALB Access Logs ----------------
+# Turns on ALB access logging to S3 (bucket + delivery policy) and streams the
+# gzipped log files back one at a time, line by line, into fixed-size
+# percentile sketches per target, per path and per minute. Nothing but the
+# sketches is kept in memory, so a day of logs costs the same as an hour.
+# botocore is only imported on the S3 paths, so --file works without it.
+
+# Regions launched before August 2022 deliver logs from a regional ELB account,
+# newer regions use the log delivery service principal instead.
+ELB_ACCOUNT_IDS = {
+    'us-east-1': '127311923021',
+    'us-east-2': '033677994240',
+    'us-west-1': '027434742980',
+    'us-west-2': '797873946194',
+    'ca-central-1': '985666609251',
+    'eu-west-1': '156460612806',
+    'eu-west-2': '652711504416',
+    'eu-west-3': '009996457667',
+    'eu-central-1': '054676820928',
+    'eu-north-1': '897822967062',
+    'ap-south-1': '718504428378',
+    'ap-northeast-1': '582318560864',
+    'ap-northeast-2': '600734575887',
+    'ap-southeast-1': '114774131450',
+    'ap-southeast-2': '783225319266',
+    'sa-east-1': '507241528517',
+}
+
+# type time elb client:port target:port request_time target_time response_time
+# elb_status target_status received_bytes sent_bytes "method url protocol" ...
+LOG_LINE = re.compile(
+    r'\S+ (?P<time>\S+) \S+ \S+ (?P<target>\S+) (?P<request_time>\S+) (?P<target_time>\S+) '
+    r'(?P<response_time>\S+) (?P<elb_status>\S+) (?P<target_status>\S+) \S+ \S+ "(?P<method>\S+) (?P<url>\S+)'
+)
+ID_SEGMENT = re.compile(r'/(?:\d+|[0-9a-fA-F-]{32,36})(?=/|$)')
+
+
+# ---------------- Enable Logging ----------------
+def bucket_policy(bucket, prefix, account_id, region):
+    resource = f"arn:aws:s3:::{bucket}/{prefix}/AWSLogs/{account_id}/*"
+    if region in ELB_ACCOUNT_IDS:
+        principal = {'AWS': f"arn:aws:iam::{ELB_ACCOUNT_IDS[region]}:root"}
+    else:
+        principal = {'Service': 'logdelivery.elasticloadbalancing.amazonaws.com'}
+    return {
+        'Version': '2012-10-17',
+        'Statement': [{
+            'Sid': f"AlbAccessLogs-{prefix}".replace('/', '-'),
+            'Effect': 'Allow',
+            'Principal': principal,
+            'Action': 's3:PutObject',
+            'Resource': resource
+        }]
+    }
+
+
+def merge_policy(s3, bucket, policy):
+    # Keep statements written for other prefixes (web and app tier share a bucket)
+    from botocore.exceptions import ClientError
+
+    try:
+        current = json.loads(s3.get_bucket_policy(Bucket=bucket)['Policy'])
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'NoSuchBucketPolicy':
+            raise
+        return policy
+    sids = {s['Sid'] for s in policy['Statement']}
+    current['Statement'] = [s for s in current['Statement'] if s.get('Sid') not in sids] + policy['Statement']
+    return current
+
+
+def enable_access_logs(session, lb_arn, bucket, prefix):
+    from botocore.exceptions import ClientError
+
+    s3 = session.client('s3')
+    region = session.region_name
+    account_id = session.client('sts').get_caller_identity()['Account']
+    try:
+        if region == 'us-east-1':
+            s3.create_bucket(Bucket=bucket)
+        else:
+            s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={'LocationConstraint': region})
+        print(f"✅ Access log bucket created: {bucket}")
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'BucketAlreadyOwnedByYou':
+            raise
+        print(f"ℹ️ Access log bucket {bucket} already exists.")
+
+    policy = merge_policy(s3, bucket, bucket_policy(bucket, prefix, account_id, region))
+    s3.put_bucket_policy(Bucket=bucket, Policy=json.dumps(policy))
+    session.client('elbv2').modify_load_balancer_attributes(
+        LoadBalancerArn=lb_arn,
+        Attributes=[
+            {'Key': 'access_logs.s3.enabled', 'Value': 'true'},
+            {'Key': 'access_logs.s3.bucket', 'Value': bucket},
+            {'Key': 'access_logs.s3.prefix', 'Value': prefix}
+        ]
+    )
+    print(f"📝 Access logs enabled: s3://{bucket}/{prefix}/")
+
+
+# ---------------- Percentile Sketch ----------------
+class LatencySketch:
+    # Log-bucketed sketch: every quantile is within `accuracy` (relative) of the
+    # true value, memory grows with the value range, not with the request count.
+    def __init__(self, accuracy=0.01):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = Counter()
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 1e-6:
+            self.zeros += 1
+        else:
+            self.buckets[math.ceil(math.log(value) / self.log_gamma)] += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+# ---------------- Streaming Analyzer ----------------
+def normalize_path(url):
+    # /orders/1234 and /orders/5678 are the same endpoint
+    return ID_SEGMENT.sub('/{id}', urlsplit(url).path or '/')
+
+
+class AccessLogAnalyzer:
+    def __init__(self, accuracy=0.01):
+        self.accuracy = accuracy
+        self.by_target = defaultdict(lambda: LatencySketch(self.accuracy))
+        self.by_path = defaultdict(lambda: LatencySketch(self.accuracy))
+        self.by_minute = defaultdict(lambda: LatencySketch(self.accuracy))
+        self.status_by_target = defaultdict(Counter)
+        self.lines = 0
+        self.skipped = 0
+
+    def add_line(self, line):
+        match = LOG_LINE.match(line)
+        if not match:
+            self.skipped += 1
+            return
+        self.lines += 1
+        times = [float(match[k]) for k in ('request_time', 'target_time', 'response_time')]
+        target = match['target'].rsplit(':', 1)[0] if match['target'] != '-' else '-'
+        self.status_by_target[target][match['elb_status']] += 1
+        # -1 means the ALB never got a response from the target (timeout, reset, 5xx from the ALB)
+        if min(times) < 0:
+            return
+        self.by_target[target].add(times[1])
+        self.by_path[f"{match['method']} {normalize_path(match['url'])}"].add(sum(times))
+        self.by_minute[match['time'][:16]].add(sum(times))
+
+    def add_stream(self, stream):
+        for line in io.TextIOWrapper(stream, encoding='utf-8', errors='replace'):
+            self.add_line(line)
+
+    def add_file(self, path):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            self.add_stream(f)
+
+    def add_s3_object(self, s3, bucket, key):
+        body = s3.get_object(Bucket=bucket, Key=key)['Body']
+        with gzip.GzipFile(fileobj=body) as f:
+            self.add_stream(f)
+
+
+def s3_log_keys(s3, bucket, prefix, date=None, lb_name=None):
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=f"{prefix}/AWSLogs/"):
+        for obj in page.get('Contents', []):
+            key = obj['Key']
+            if not key.endswith('.log.gz'):
+                continue
+            if date and f"/{date}/" not in key:
+                continue
+            if lb_name and f"app.{lb_name}." not in key:
+                continue
+            yield key
+
+
+# ---------------- Report ----------------
+def print_table(title, sketches, top, label_width=48):
+    print(f"\n{title}")
+    print(f"   {'':<{label_width}} {'requests':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for label, sketch in sketches[:top]:
+        print(f"   {label[:label_width]:<{label_width}} {sketch.count:>9} "
+              f"{sketch.quantile(0.5) * 1000:>8.0f} {sketch.quantile(0.9) * 1000:>8.0f} "
+              f"{sketch.quantile(0.99) * 1000:>8.0f} {sketch.quantile(1.0) * 1000:>8.0f}")
+
+
+def print_report(analyzer, top=10, min_requests=20):
+    print(f"📊 {analyzer.lines} requests parsed ({analyzer.skipped} unparsed lines)")
+
+    def slowest(sketches):
+        busy = [(k, s) for k, s in sketches.items() if s.count >= min_requests]
+        return sorted(busy, key=lambda item: item[1].quantile(0.99), reverse=True)
+
+    print_table("🖥️ Slowest targets (target_processing_time)", slowest(analyzer.by_target), top, 21)
+    for target, statuses in sorted(analyzer.status_by_target.items()):
+        errors = sum(n for status, n in statuses.items() if status.startswith('5'))
+        if errors:
+            print(f"   ⚠️ {target}: {errors} 5xx of {sum(statuses.values())} requests")
+
+    print_table("🛣️ Slowest paths (total time)", slowest(analyzer.by_path), top)
+    print_table("🕒 Per minute (total time)", sorted(analyzer.by_minute.items()), len(analyzer.by_minute), 21)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream ALB access logs into latency percentiles")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--bucket', help="S3 bucket the ALB writes its access logs to")
+    source.add_argument('--file', nargs='+', help="local log files (.log or .log.gz), no AWS access needed")
+    parser.add_argument('--prefix', default='web-tier', help="access log prefix configured on the ALB")
+    parser.add_argument('--date', help="only read one day, e.g. 2026/10/19")
+    parser.add_argument('--lb-name', help="only read logs of this load balancer")
+    parser.add_argument('--top', type=int, default=10, help="rows per table")
+    parser.add_argument('--min-requests', type=int, default=20, help="ignore targets/paths with fewer requests")
+    args = parser.parse_args()
+
+    analyzer = AccessLogAnalyzer()
+    if args.file:
+        for path in args.file:
+            analyzer.add_file(path)
+    else:
+        import boto3
+        from botocore.exceptions import ClientError
+
+        session = boto3.session.Session(profile_name="boto3-user", region_name="us-east-1")
+        s3 = session.client('s3')
+        files = 0
+        try:
+            for key in s3_log_keys(s3, args.bucket, args.prefix, args.date, args.lb_name):
+                analyzer.add_s3_object(s3, args.bucket, key)
+                files += 1
+        except ClientError as e:
+            print("❌ Failed to read access logs:", e.response['Error']['Message'])
+            exit(1)
+        print(f"📥 {files} log file(s) streamed from s3://{args.bucket}/{args.prefix}/")
+    print_report(analyzer, args.top, args.min_requests)
@@ -0,0 +1,227 @@
+import time
+from datetime import datetime, timedelta, timezone
+from botocore.exceptions import ClientError
+from instance_refresh import create_template_version, track_default
+
+# ---------------- Blue/Green Web Tier Deploys ----------------
+# Builds a second ASG + target group (the idle colour) from a new launch
+# template version, pre-warms it to the live fleet's capacity, then shifts the
+# listener's weighted ForwardConfig in steps. Every step is gated on the new
+# target group's response time and 5xx rate; a failed gate puts 100% of the
+# weight back on the live colour in a single modify_listener call.
+
+
+def forward_action(weights):
+    # weights: {target group arn: weight}
+    return [{
+        'Type': 'forward',
+        'ForwardConfig': {
+            'TargetGroups': [{'TargetGroupArn': arn, 'Weight': weight} for arn, weight in weights.items()],
+            'TargetGroupStickinessConfig': {'Enabled': False}
+        }
+    }]
+
+
+def set_weights(elbv2, listener_arn, weights):
+    elbv2.modify_listener(ListenerArn=listener_arn, DefaultActions=forward_action(weights))
+
+
+def live_target_group(elbv2, listener_arn):
+    action = elbv2.describe_listeners(ListenerArns=[listener_arn])['Listeners'][0]['DefaultActions'][0]
+    groups = action.get('ForwardConfig', {}).get('TargetGroups') or [{'TargetGroupArn': action['TargetGroupArn'],
+                                                                       'Weight': 1}]
+    return max(groups, key=lambda g: g.get('Weight', 1))['TargetGroupArn']
+
+
+def group_for_target_group(autoscaling, target_group_arn):
+    for page in autoscaling.get_paginator('describe_auto_scaling_groups').paginate():
+        for group in page['AutoScalingGroups']:
+            if target_group_arn in group.get('TargetGroupARNs', []):
+                return group
+    return None
+
+
+def live_group_for_load_balancer(elbv2, autoscaling, lb_arn):
+    # After a blue/green deploy the live fleet is <asg>-green or <asg>-blue, not the original ASG
+    listener_arn = elbv2.describe_listeners(LoadBalancerArn=lb_arn)['Listeners'][0]['ListenerArn']
+    return group_for_target_group(autoscaling, live_target_group(elbv2, listener_arn))
+
+
+# ---------------- Idle Colour ----------------
+def create_idle_target_group(elbv2, live_tg, name):
+    response = elbv2.create_target_group(
+        Name=name,
+        Protocol=live_tg['Protocol'],
+        Port=live_tg['Port'],
+        VpcId=live_tg['VpcId'],
+        TargetType=live_tg['TargetType'],
+        HealthCheckProtocol=live_tg['HealthCheckProtocol'],
+        HealthCheckPort=live_tg['HealthCheckPort'],
+        HealthCheckPath=live_tg['HealthCheckPath'],
+        HealthCheckIntervalSeconds=live_tg['HealthCheckIntervalSeconds'],
+        HealthCheckTimeoutSeconds=live_tg['HealthCheckTimeoutSeconds'],
+        HealthyThresholdCount=live_tg['HealthyThresholdCount'],
+        UnhealthyThresholdCount=live_tg['UnhealthyThresholdCount'],
+        Matcher=live_tg['Matcher']
+    )
+    return response['TargetGroups'][0]['TargetGroupArn']
+
+
+def create_idle_group(autoscaling, live_group, name, launch_template_name, version, target_group_arn):
+    spec = {'LaunchTemplateName': launch_template_name, 'Version': str(version)}
+    if 'MixedInstancesPolicy' in live_group:
+        policy = live_group['MixedInstancesPolicy']
+        policy['LaunchTemplate']['LaunchTemplateSpecification'] = spec
+        launch_config = {'MixedInstancesPolicy': policy}
+    else:
+        launch_config = {'LaunchTemplate': spec}
+    # Pre-warm: start at the live fleet's current capacity and hold it there (MinSize) while
+    # the copied scaling policy only sees 10-25% of the traffic; deploy() restores MinSize
+    autoscaling.create_auto_scaling_group(
+        AutoScalingGroupName=name,
+        **launch_config,
+        MinSize=live_group['DesiredCapacity'],
+        MaxSize=live_group['MaxSize'],
+        DesiredCapacity=live_group['DesiredCapacity'],
+        VPCZoneIdentifier=live_group['VPCZoneIdentifier'],
+        TargetGroupARNs=[target_group_arn],
+        HealthCheckType=live_group['HealthCheckType'],
+        HealthCheckGracePeriod=live_group['HealthCheckGracePeriod'],
+        Tags=[{'Key': t['Key'], 'Value': t['Value'], 'PropagateAtLaunch': t['PropagateAtLaunch']}
+              for t in live_group.get('Tags', []) if not t['Key'].startswith('aws:')]
+    )
+    for policy in autoscaling.describe_policies(AutoScalingGroupName=live_group['AutoScalingGroupName'])[
+            'ScalingPolicies']:
+        if policy['PolicyType'] == 'TargetTrackingScaling':
+            autoscaling.put_scaling_policy(
+                AutoScalingGroupName=name,
+                PolicyName=policy['PolicyName'],
+                PolicyType='TargetTrackingScaling',
+                TargetTrackingConfiguration=policy['TargetTrackingConfiguration'],
+                EstimatedInstanceWarmup=policy.get('EstimatedInstanceWarmup', 300)
+            )
+
+
+def remove_group(autoscaling, name):
+    # The idle colour may still exist (scaled to 0) from an earlier deploy
+    if not autoscaling.describe_auto_scaling_groups(AutoScalingGroupNames=[name])['AutoScalingGroups']:
+        return
+    autoscaling.delete_auto_scaling_group(AutoScalingGroupName=name, ForceDelete=True)
+    while autoscaling.describe_auto_scaling_groups(AutoScalingGroupNames=[name])['AutoScalingGroups']:
+        time.sleep(10)
+
+
+def wait_until_healthy(elbv2, target_group_arn, count, timeout=900):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        states = [t['TargetHealth']['State'] for t in
+                  elbv2.describe_target_health(TargetGroupArn=target_group_arn)['TargetHealthDescriptions']]
+        healthy = states.count('healthy')
+        print(f"   {healthy}/{count} targets healthy")
+        if healthy >= count:
+            return True
+        time.sleep(15)
+    return False
+
+
+# ---------------- Gates ----------------
+def arn_dimension(arn):
+    # arn:...:loadbalancer/app/name/id -> app/name/id, arn:...:targetgroup/name/id -> targetgroup/name/id
+    resource = arn.split(':', 5)[5]
+    return resource.split('/', 1)[1] if resource.startswith('loadbalancer/') else resource
+
+
+def target_group_metrics(cloudwatch, lb_arn, target_group_arn, seconds):
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(seconds=max(seconds, 60))
+    dimensions = [{'Name': 'LoadBalancer', 'Value': arn_dimension(lb_arn)},
+                  {'Name': 'TargetGroup', 'Value': arn_dimension(target_group_arn)}]
+
+    def stat(metric, **statistic):
+        return cloudwatch.get_metric_statistics(Namespace='AWS/ApplicationELB', MetricName=metric,
+                                                Dimensions=dimensions, StartTime=start, EndTime=end,
+                                                Period=60, **statistic)['Datapoints']
+
+    latency = stat('TargetResponseTime', ExtendedStatistics=['p99'])
+    requests = sum(p['Sum'] for p in stat('RequestCount', Statistics=['Sum']))
+    errors = sum(p['Sum'] for p in stat('HTTPCode_Target_5XX_Count', Statistics=['Sum']))
+    p99 = max((p['ExtendedStatistics']['p99'] for p in latency), default=0.0)
+    return p99, (errors / requests if requests else 0.0), requests
+
+
+def gate(cloudwatch, lb_arn, target_group_arn, bake_seconds, max_p99_seconds, max_5xx_rate):
+    time.sleep(bake_seconds)
+    p99, error_rate, requests = target_group_metrics(cloudwatch, lb_arn, target_group_arn, bake_seconds)
+    print(f"   📏 {requests:.0f} requests, p99 {p99 * 1000:.0f} ms, 5xx rate {error_rate:.2%}")
+    return p99 <= max_p99_seconds and error_rate <= max_5xx_rate
+
+
+# ---------------- Deploy ----------------
+def deploy(session, lb_arn, launch_template_name, launch_template_data, base_name,
+           weight_steps=(10, 25, 50, 100), bake_seconds=180, max_p99_seconds=1.0, max_5xx_rate=0.01,
+           retire_previous=True):
+    ec2 = session.client('ec2')
+    elbv2 = session.client('elbv2')
+    autoscaling = session.client('autoscaling')
+    cloudwatch = session.client('cloudwatch')
+
+    listener_arn = elbv2.describe_listeners(LoadBalancerArn=lb_arn)['Listeners'][0]['ListenerArn']
+    live_tg_arn = live_target_group(elbv2, listener_arn)
+    live_tg = elbv2.describe_target_groups(TargetGroupArns=[live_tg_arn])['TargetGroups'][0]
+    live_group = group_for_target_group(autoscaling, live_tg_arn)
+    if not live_group:
+        print(f"❌ No Auto Scaling Group serves {live_tg['TargetGroupName']}.")
+        return False
+
+    colour = 'blue' if live_tg['TargetGroupName'].endswith('-green') else 'green'
+    idle_tg_name = f"{base_name[:24]}-{colour}"
+    idle_group_name = f"{base_name}-{colour}"
+    print(f"🔵🟢 Live: {live_tg['TargetGroupName']} / {live_group['AutoScalingGroupName']}, deploying {colour}.")
+
+    try:
+        version = create_template_version(ec2, launch_template_name, launch_template_data,
+                                          f"{colour} deploy")
+        idle_tg_arn = create_idle_target_group(elbv2, live_tg, idle_tg_name)
+        remove_group(autoscaling, idle_group_name)
+        create_idle_group(autoscaling, live_group, idle_group_name, launch_template_name, version, idle_tg_arn)
+        print(f"✅ {idle_group_name} created with {live_group['DesiredCapacity']} instance(s), warming up...")
+    except ClientError as e:
+        print("❌ Blue/green deploy failed:", e.response['Error']['Message'])
+        return False
+
+    def roll_back(reason):
+        print(f"↩️ {reason}, all traffic back on {live_tg['TargetGroupName']}.")
+        try:
+            set_weights(elbv2, listener_arn, {live_tg_arn: 100, idle_tg_arn: 0})
+            autoscaling.update_auto_scaling_group(AutoScalingGroupName=idle_group_name,
+                                                  MinSize=0, DesiredCapacity=0)
+        except ClientError as e:
+            print("❌ Rollback failed, check the listener weights by hand:", e.response['Error']['Message'])
+        return False
+
+    try:
+        if not wait_until_healthy(elbv2, idle_tg_arn, live_group['DesiredCapacity']):
+            return roll_back("New fleet never became healthy")
+
+        for weight in weight_steps:
+            set_weights(elbv2, listener_arn, {live_tg_arn: 100 - weight, idle_tg_arn: weight})
+            print(f"⚖️ {weight}% of traffic on {colour}")
+            if not gate(cloudwatch, lb_arn, idle_tg_arn, bake_seconds, max_p99_seconds, max_5xx_rate):
+                return roll_back("Gate failed")
+        # The shift is done, let the scaling policy size the new fleet again
+        autoscaling.update_auto_scaling_group(AutoScalingGroupName=idle_group_name, MinSize=live_group['MinSize'])
+    except ClientError as e:
+        return roll_back(f"Blue/green deploy failed ({e.response['Error']['Message']})")
+
+    # All traffic is on the new colour now, a failure below only leaves housekeeping undone
+    try:
+        ec2.modify_launch_template(LaunchTemplateName=launch_template_name, DefaultVersion=str(version))
+        track_default(autoscaling, idle_group_name, launch_template_name)
+        if retire_previous:
+            autoscaling.update_auto_scaling_group(AutoScalingGroupName=live_group['AutoScalingGroupName'],
+                                                  MinSize=0, DesiredCapacity=0)
+            print(f"🛌 {live_group['AutoScalingGroupName']} scaled to 0 (kept for the next deploy).")
+    except ClientError as e:
+        print("⚠️ Post-deploy cleanup failed:", e.response['Error']['Message'])
+    print(f"✅ {colour} is live.")
+    return True
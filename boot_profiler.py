@@ -0,0 +1,216 @@
+import argparse
+import re
+import statistics
+import time
+from datetime import datetime, timezone
+
+# ---------------- Instance Boot-Time Profiler ----------------
+# Splits the boot of web/app tier instances into phases using the console
+# output (cloud-init "Up N seconds" banners and the
+# BOOT_PHASE markers written by the user data), optionally enriched with
+# `cloud-init analyze blame` pulled over SSM, and aggregates them across
+# instances so HealthCheckGracePeriod / EstimatedInstanceWarmup can be sized.
+# The ALB does not record when a target turned healthy, so with --watch the
+# profiler polls target health for instances still in 'initial' and measures
+# the transition itself; without it only an estimate (total boot + interval x
+# healthy threshold) is reported, labelled as such.
+
+# ASG / target group names as created by Part-3 and Part-4
+TIERS = {
+    'web': "My Company Web Server Auto Scaling Group".replace(" ", "-")[:28],
+    'app': "CompanyAppTierASG".replace(" ", "-")[:28],
+}
+
+CLOUD_INIT_STAGE = re.compile(r"Cloud-init v\. \S+ running '([\w:-]+)' at .*?Up ([\d.]+) seconds")
+CLOUD_INIT_FINISHED = re.compile(r"Cloud-init v\. \S+ finished at .*?Up ([\d.]+) seconds")
+BOOT_PHASE = re.compile(r"BOOT_PHASE (\S+) ([\d.]+)")
+BLAME_LINE = re.compile(r"^\s*([\d.]+)s \((\S+)\)", re.MULTILINE)
+
+# cloud-init stage -> phase that starts with it
+STAGE_PHASES = [
+    ('init-local', 'cloud-init init-local'),
+    ('init', 'cloud-init init'),
+    ('modules:config', 'cloud-init config'),
+    ('modules:final', 'cloud-init final'),
+]
+
+
+# ---------------- Parsing ----------------
+def parse_boot_log(text):
+    # Phase name -> start uptime; each phase lasts until the next mark
+    marks = {'kernel': 0.0}
+    stages = dict(CLOUD_INIT_STAGE.findall(text))
+    for stage, phase in STAGE_PHASES:
+        if stage in stages:
+            marks[phase] = float(stages[stage])
+    for name, uptime in BOOT_PHASE.findall(text):
+        marks[name] = float(uptime)
+    finished = CLOUD_INIT_FINISHED.search(text)
+    if finished:
+        marks['done'] = float(finished.group(1))
+    ordered = sorted(marks.items(), key=lambda mark: mark[1])
+
+    timings = {}
+    for (phase, start), (_, end) in zip(ordered, ordered[1:]):
+        timings[phase] = round(end - start, 2)
+    if 'done' in marks:
+        timings['total boot'] = marks['done']
+    return timings
+
+
+def parse_blame(text, top=5):
+    modules = sorted(((float(sec), name) for sec, name in BLAME_LINE.findall(text)), reverse=True)
+    return {f"module {name}": sec for sec, name in modules[:top]}
+
+
+# ---------------- AWS Collection ----------------
+def find_recent_instances(ec2, asg_name, count):
+    paginator = ec2.get_paginator('describe_instances')
+    pages = paginator.paginate(Filters=[
+        {'Name': 'tag:aws:autoscaling:groupName', 'Values': [asg_name]},
+        {'Name': 'instance-state-name', 'Values': ['pending', 'running']}
+    ])
+    instances = [i for page in pages for r in page['Reservations'] for i in r['Instances']]
+    instances.sort(key=lambda i: i['LaunchTime'], reverse=True)
+    return instances[:count]
+
+
+def fetch_cloud_init_logs(ssm, instance_id, timeout=60):
+    command = ssm.send_command(
+        InstanceIds=[instance_id],
+        DocumentName='AWS-RunShellScript',
+        Parameters={'commands': [
+            'cloud-init analyze blame -i /var/log/cloud-init.log',
+            'grep BOOT_PHASE /var/log/cloud-init-output.log',
+        ]}
+    )
+    command_id = command['Command']['CommandId']
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        time.sleep(2)
+        try:
+            result = ssm.get_command_invocation(CommandId=command_id, InstanceId=instance_id)
+        except ssm.exceptions.InvocationDoesNotExist:
+            continue
+        if result['Status'] not in ('Pending', 'InProgress', 'Delayed'):
+            return result.get('StandardOutputContent', '')
+    return ''
+
+
+def console_output(ec2, instance, hypervisors):
+    # Latest=True is only supported on Nitro instances, Xen ones (t2) return the buffered output
+    instance_type = instance['InstanceType']
+    if instance_type not in hypervisors:
+        item = ec2.describe_instance_types(InstanceTypes=[instance_type])['InstanceTypes'][0]
+        hypervisors[instance_type] = item.get('Hypervisor')
+    options = {'Latest': True} if hypervisors[instance_type] == 'nitro' else {}
+    return ec2.get_console_output(InstanceId=instance['InstanceId'], **options).get('Output', '')
+
+
+def healthy_check_delay(tg):
+    # Earliest time a target can be marked healthy after httpd answers
+    return tg['HealthCheckIntervalSeconds'] * tg['HealthyThresholdCount']
+
+
+def watch_healthy(elbv2, tg, instances, timeout, poll=5):
+    # Seconds from launch to the first poll that sees the target healthy (+/- poll).
+    # Targets already healthy at the first poll turned healthy unobserved and are left out.
+    launched = {i['InstanceId']: i['LaunchTime'] for i in instances}
+    waiting, healthy = set(), {}
+    first = True
+    deadline = time.time() + timeout
+    while first or (waiting and time.time() < deadline):
+        targets = [{'Id': instance_id} for instance_id in (launched if first else waiting)]
+        states = elbv2.describe_target_health(TargetGroupArn=tg['TargetGroupArn'], Targets=targets)
+        now = datetime.now(timezone.utc)
+        for item in states['TargetHealthDescriptions']:
+            instance_id, state = item['Target']['Id'], item['TargetHealth']['State']
+            if first and state in ('initial', 'unused'):
+                waiting.add(instance_id)
+            elif not first and state == 'healthy':
+                waiting.discard(instance_id)
+                healthy[instance_id] = round((now - launched[instance_id]).total_seconds(), 1)
+        if first:
+            print(f"⏳ Watching {len(waiting)} of {len(launched)} target(s) for their healthy transition")
+        first = False
+        if waiting:
+            time.sleep(poll)
+    for instance_id in waiting:
+        print(f"⚠️ {instance_id} did not turn healthy within {timeout}s")
+    return healthy
+
+
+def profile_instances(session, tier, count, use_ssm, watch=0):
+    ec2 = session.client('ec2')
+    elbv2 = session.client('elbv2')
+    ssm = session.client('ssm') if use_ssm else None
+
+    tg = elbv2.describe_target_groups(Names=[f"{TIERS[tier]}-TG"])['TargetGroups'][0]
+    health_delay = healthy_check_delay(tg)
+    instances = find_recent_instances(ec2, TIERS[tier], count)
+    healthy = watch_healthy(elbv2, tg, instances, watch) if watch else {}
+    profiles = {}
+    hypervisors = {}
+    for instance in instances:
+        instance_id = instance['InstanceId']
+        output = console_output(ec2, instance, hypervisors)
+        if use_ssm:
+            output += '\n' + fetch_cloud_init_logs(ssm, instance_id)
+        timings = parse_boot_log(output)
+        if use_ssm:
+            timings.update(parse_blame(output))
+        if instance_id in healthy:
+            timings['healthy after launch'] = healthy[instance_id]
+        elif 'total boot' in timings:
+            timings['healthy (estimate, not measured)'] = timings['total boot'] + health_delay
+        if timings:
+            profiles[instance_id] = timings
+        else:
+            print(f"⚠️ No boot timings found for {instance_id} (console output not available yet?)")
+    return profiles
+
+
+# ---------------- Report ----------------
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def print_report(profiles):
+    if not profiles:
+        print("ℹ️ Nothing to report.")
+        return
+    phases = []
+    for timings in profiles.values():
+        phases += [phase for phase in timings if phase not in phases]
+
+    print(f"⏱️ Boot profile over {len(profiles)} instance(s), seconds:")
+    print(f"{'Phase':<34}{'n':>4}{'min':>9}{'median':>9}{'p90':>9}{'max':>9}")
+    for phase in phases:
+        values = [t[phase] for t in profiles.values() if phase in t]
+        print(f"{phase:<34}{len(values):>4}{min(values):>9.1f}{statistics.median(values):>9.1f}"
+              f"{percentile(values, 90):>9.1f}{max(values):>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile instance boot time per phase")
+    parser.add_argument('--tier', choices=sorted(TIERS), default='web')
+    parser.add_argument('--count', type=int, default=5, help="number of most recent instances")
+    parser.add_argument('--ssm', action='store_true', help="also pull cloud-init logs via SSM")
+    parser.add_argument('--watch', type=int, default=0, metavar='SECONDS',
+                        help="poll target health up to SECONDS to measure when booting instances turn healthy")
+    parser.add_argument('--file', nargs='+', help="parse saved console logs instead of calling AWS")
+    args = parser.parse_args()
+
+    if args.file:
+        profiles = {}
+        for path in args.file:
+            with open(path, errors='replace') as f:
+                text = f.read()
+            profiles[path] = {**parse_boot_log(text), **parse_blame(text)}
+    else:
+        import boto3
+        session = boto3.session.Session(profile_name="boto3-user", region_name="us-east-1")
+        profiles = profile_instances(session, args.tier, args.count, args.ssm, args.watch)
+    print_report(profiles)
@@ -1,6 +1,11 @@
+import os
+import sys
+import time
 import boto3
 from botocore.exceptions import ClientError
-import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inventory import Inventory, LOAD_BALANCER, TARGET_GROUP
 
 # ---------------- AWS Session ----------------
 session = boto3.Session(profile_name="boto3-user", region_name="us-east-1")
@@ -13,25 +18,38 @@ base_name = "My Company Web Server Auto Scaling Group"
 sanitized_name = base_name.replace(" ", "-")[:28]
 
 asg_name = f"{sanitized_name}"
+# Blue/green deploys (blue_green.py) add one ASG and target group per colour
+asg_names = [asg_name, f"{sanitized_name}-green", f"{sanitized_name}-blue"]
 launch_template_name = "Company-Web-Tier-Server"
 target_group_name = f"{sanitized_name}-TG"
+target_group_names = [target_group_name, f"{sanitized_name[:24]}-green", f"{sanitized_name[:24]}-blue"]
 lb_name = f"{sanitized_name}-LB"[:32]
+placement_group_name = f"{sanitized_name}-PG"
 
-# ---------------- Delete Auto Scaling Group ----------------
-try:
-    autoscaling.update_auto_scaling_group(
-        AutoScalingGroupName=asg_name,
-        MinSize=0,
-        MaxSize=0,
-        DesiredCapacity=0
-    )
-    autoscaling.delete_auto_scaling_group(
-        AutoScalingGroupName=asg_name,
-        ForceDelete=True
-    )
-    print(f"🗑️ Auto Scaling Group '{asg_name}' deletion initiated.")
-except ClientError as e:
-    print("⚠️ Error deleting ASG:", e.response['Error']['Message'])
+# ---------------- Inventory ----------------
+# One paginated scan of load balancers and target groups, lookups below are local
+inventory = Inventory(session).refresh([LOAD_BALANCER, TARGET_GROUP])
+
+# ---------------- Delete Auto Scaling Groups ----------------
+existing_asgs = autoscaling.describe_auto_scaling_groups(AutoScalingGroupNames=asg_names)['AutoScalingGroups']
+for group in existing_asgs:
+    name = group['AutoScalingGroupName']
+    try:
+        autoscaling.update_auto_scaling_group(
+            AutoScalingGroupName=name,
+            MinSize=0,
+            MaxSize=0,
+            DesiredCapacity=0
+        )
+        autoscaling.delete_auto_scaling_group(
+            AutoScalingGroupName=name,
+            ForceDelete=True
+        )
+        print(f"🗑️ Auto Scaling Group '{name}' deletion initiated.")
+    except ClientError as e:
+        print("⚠️ Error deleting ASG:", e.response['Error']['Message'])
+if not existing_asgs:
+    print(f"⚠️ Auto Scaling Group '{asg_name}' not found.")
 
 # ---------------- Delete Launch Template ----------------
 try:
@@ -40,18 +58,9 @@ try:
 except ClientError as e:
     print("⚠️ Error deleting Launch Template:", e.response['Error']['Message'])
 
-# ---------------- Delete Load Balancer ----------------
-try:
-    lbs = elbv2.describe_load_balancers(Names=[lb_name])
-    lb_arn = lbs['LoadBalancers'][0]['LoadBalancerArn']
-    elbv2.delete_load_balancer(LoadBalancerArn=lb_arn)
-    print(f"🗑️ Load Balancer '{lb_name}' deletion initiated.")
-    time.sleep(20)  # Wait for LB to fully delete before deleting the target group
-except ClientError as e:
-    print("⚠️ Error deleting Load Balancer:", e.response['Error']['Message'])
-    lb_arn = None
-
-# ---------------- Delete Listener ----------------
+# ---------------- Delete Listeners ----------------
+lb = inventory.get(LOAD_BALANCER, lb_name)
+lb_arn = lb['id'] if lb else None
 if lb_arn:
     try:
         listeners = elbv2.describe_listeners(LoadBalancerArn=lb_arn)
@@ -61,11 +70,47 @@ if lb_arn:
     except ClientError as e:
         print("⚠️ Error deleting listener:", e.response['Error']['Message'])
 
-# ---------------- Delete Target Group ----------------
+# ---------------- Delete Load Balancer ----------------
+if lb_arn:
+    try:
+        elbv2.delete_load_balancer(LoadBalancerArn=lb_arn)
+        print(f"🗑️ Load Balancer '{lb_name}' deletion initiated.")
+        # Wait for LB to fully delete before deleting the target group
+        elbv2.get_waiter('load_balancers_deleted').wait(LoadBalancerArns=[lb_arn])
+    except ClientError as e:
+        print("⚠️ Error deleting Load Balancer:", e.response['Error']['Message'])
+else:
+    print(f"⚠️ Load Balancer '{lb_name}' not found.")
+
+# ---------------- Delete Target Groups ----------------
+for name in target_group_names:
+    tg = inventory.get(TARGET_GROUP, name)
+    if tg:
+        try:
+            elbv2.delete_target_group(TargetGroupArn=tg['id'])
+            print(f"🗑️ Target Group '{name}' deleted.")
+        except ClientError as e:
+            print("⚠️ Error deleting Target Group:", e.response['Error']['Message'])
+    elif name == target_group_name:
+        print(f"⚠️ Target Group '{name}' not found.")
+
+# ---------------- Delete Placement Group ----------------
+# Only possible once the ASG's instances have left it
+live_states = ['pending', 'running', 'shutting-down', 'stopping', 'stopped']
+deadline = time.time() + 900
+while ec2.describe_instances(Filters=[
+        {'Name': 'placement-group-name', 'Values': [placement_group_name]},
+        {'Name': 'instance-state-name', 'Values': live_states}])['Reservations']:
+    if time.time() > deadline:
+        print(f"⚠️ Instances still in placement group '{placement_group_name}' after 15 minutes.")
+        break
+    print(f"⏳ Waiting for instances to leave placement group '{placement_group_name}'...")
+    time.sleep(15)
 try:
-    tgs = elbv2.describe_target_groups(Names=[target_group_name])
-    target_group_arn = tgs['TargetGroups'][0]['TargetGroupArn']
-    elbv2.delete_target_group(TargetGroupArn=target_group_arn)
-    print(f"🗑️ Target Group '{target_group_name}' deleted.")
+    ec2.delete_placement_group(GroupName=placement_group_name)
+    print(f"🗑️ Placement Group '{placement_group_name}' deleted.")
 except ClientError as e:
-    print("⚠️ Error deleting Target Group:", e.response['Error']['Message'])
+    if 'InvalidPlacementGroup.Unknown' in e.response['Error']['Code']:
+        print(f"⚠️ Placement Group '{placement_group_name}' not found.")
+    else:
+        print("⚠️ Error deleting Placement Group:", e.response['Error']['Message'])
@@ -1,12 +1,18 @@
+import os
+import sys
+import time
 import boto3
 from botocore.exceptions import ClientError
-import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inventory import Inventory, LOAD_BALANCER, TARGET_GROUP
 
 # ---------------- AWS Session ----------------
 session = boto3.Session(profile_name="boto3-user", region_name="us-east-1")
 ec2 = session.client('ec2')
 elbv2 = session.client('elbv2')
 autoscaling = session.client('autoscaling')
+iam = session.client('iam')
 
 # ---------------- Parameters (Match Your Previous Setup) ----------------
 base_name = "CompanyAppTierASG"
@@ -16,6 +22,13 @@ asg_name = f"{sanitized_name}"
 launch_template_name = "Company-Application-Tier"
 target_group_name = f"{sanitized_name}-TG"
 lb_name = f"{sanitized_name}-LB"[:32]
+placement_group_name = f"{sanitized_name}-PG"
+instance_role_name = f"{sanitized_name}-Role"
+instance_profile_name = f"{sanitized_name}-Profile"
+
+# ---------------- Inventory ----------------
+# One paginated scan of load balancers and target groups, lookups below are local
+inventory = Inventory(session).refresh([LOAD_BALANCER, TARGET_GROUP])
 
 # ---------------- Delete Auto Scaling Group ----------------
 try:
@@ -40,18 +53,9 @@ try:
 except ClientError as e:
     print("⚠️ Error deleting Launch Template:", e.response['Error']['Message'])
 
-# ---------------- Delete Load Balancer ----------------
-try:
-    lbs = elbv2.describe_load_balancers(Names=[lb_name])
-    lb_arn = lbs['LoadBalancers'][0]['LoadBalancerArn']
-    elbv2.delete_load_balancer(LoadBalancerArn=lb_arn)
-    print(f"🗑️ Load Balancer '{lb_name}' deletion initiated.")
-    time.sleep(20)  # Wait for LB to fully delete before deleting the target group
-except ClientError as e:
-    print("⚠️ Error deleting Load Balancer:", e.response['Error']['Message'])
-    lb_arn = None
-
-# ---------------- Delete Listener ----------------
+# ---------------- Delete Listeners ----------------
+lb = inventory.get(LOAD_BALANCER, lb_name)
+lb_arn = lb['id'] if lb else None
 if lb_arn:
     try:
         listeners = elbv2.describe_listeners(LoadBalancerArn=lb_arn)
@@ -61,11 +65,66 @@ if lb_arn:
     except ClientError as e:
         print("⚠️ Error deleting listener:", e.response['Error']['Message'])
 
+# ---------------- Delete Load Balancer ----------------
+if lb_arn:
+    try:
+        elbv2.delete_load_balancer(LoadBalancerArn=lb_arn)
+        print(f"🗑️ Load Balancer '{lb_name}' deletion initiated.")
+        # Wait for LB to fully delete before deleting the target group
+        elbv2.get_waiter('load_balancers_deleted').wait(LoadBalancerArns=[lb_arn])
+    except ClientError as e:
+        print("⚠️ Error deleting Load Balancer:", e.response['Error']['Message'])
+else:
+    print(f"⚠️ Load Balancer '{lb_name}' not found.")
+
 # ---------------- Delete Target Group ----------------
+tg = inventory.get(TARGET_GROUP, target_group_name)
+if tg:
+    try:
+        elbv2.delete_target_group(TargetGroupArn=tg['id'])
+        print(f"🗑️ Target Group '{target_group_name}' deleted.")
+    except ClientError as e:
+        print("⚠️ Error deleting Target Group:", e.response['Error']['Message'])
+else:
+    print(f"⚠️ Target Group '{target_group_name}' not found.")
+
+# ---------------- Delete Placement Group ----------------
+# Only possible once the ASG's instances have left it
+live_states = ['pending', 'running', 'shutting-down', 'stopping', 'stopped']
+deadline = time.time() + 900
+while ec2.describe_instances(Filters=[
+        {'Name': 'placement-group-name', 'Values': [placement_group_name]},
+        {'Name': 'instance-state-name', 'Values': live_states}])['Reservations']:
+    if time.time() > deadline:
+        print(f"⚠️ Instances still in placement group '{placement_group_name}' after 15 minutes.")
+        break
+    print(f"⏳ Waiting for instances to leave placement group '{placement_group_name}'...")
+    time.sleep(15)
+try:
+    ec2.delete_placement_group(GroupName=placement_group_name)
+    print(f"🗑️ Placement Group '{placement_group_name}' deleted.")
+except ClientError as e:
+    if 'InvalidPlacementGroup.Unknown' in e.response['Error']['Code']:
+        print(f"⚠️ Placement Group '{placement_group_name}' not found.")
+    else:
+        print("⚠️ Error deleting Placement Group:", e.response['Error']['Message'])
+
+# ---------------- Delete Instance Profile ----------------
+try:
+    iam.remove_role_from_instance_profile(InstanceProfileName=instance_profile_name, RoleName=instance_role_name)
+    iam.delete_instance_profile(InstanceProfileName=instance_profile_name)
+    print(f"🗑️ Instance Profile '{instance_profile_name}' deleted.")
+except ClientError as e:
+    if e.response['Error']['Code'] == 'NoSuchEntity':
+        print(f"⚠️ Instance Profile '{instance_profile_name}' not found.")
+    else:
+        print("⚠️ Error deleting Instance Profile:", e.response['Error']['Message'])
 try:
-    tgs = elbv2.describe_target_groups(Names=[target_group_name])
-    target_group_arn = tgs['TargetGroups'][0]['TargetGroupArn']
-    elbv2.delete_target_group(TargetGroupArn=target_group_arn)
-    print(f"🗑️ Target Group '{target_group_name}' deleted.")
+    iam.delete_role_policy(RoleName=instance_role_name, PolicyName='ReadCacheEndpoint')
+    iam.delete_role(RoleName=instance_role_name)
+    print(f"🗑️ IAM Role '{instance_role_name}' deleted.")
 except ClientError as e:
-    print("⚠️ Error deleting Target Group:", e.response['Error']['Message'])
+    if e.response['Error']['Code'] == 'NoSuchEntity':
+        print(f"⚠️ IAM Role '{instance_role_name}' not found.")
+    else:
+        print("⚠️ Error deleting IAM Role:", e.response['Error']['Message'])
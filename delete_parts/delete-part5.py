@@ -1,6 +1,11 @@
+import os
+import sys
 import boto3
 from botocore.exceptions import ClientError
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inventory import Inventory, SECURITY_GROUP
+
 # ---------------- AWS Session Setup ----------------
 session = boto3.session.Session(profile_name="boto3-user", region_name="us-east-1")
 rds = session.client('rds')
@@ -48,18 +53,16 @@ except ClientError as e:
         print("❌ Failed to delete DB subnet group:", e.response['Error']['Message'])
 
 # ---------------- Delete Security Groups ----------------
+inventory = Inventory(session).refresh([SECURITY_GROUP])
+
+
 def delete_sg(sg_name):
+    sg = inventory.get(SECURITY_GROUP, sg_name, vpc_id=vpc_id)
+    if not sg:
+        print(f"ℹ️ Security group '{sg_name}' already deleted.")
+        return
+    sg_id = sg['id']
     try:
-        # Find SG ID by name
-        response = ec2.describe_security_groups(
-            Filters=[
-                {'Name': 'group-name', 'Values': [sg_name]},
-                {'Name': 'vpc-id', 'Values': [vpc_id]}
-            ]
-        )
-        sg_id = response['SecurityGroups'][0]['GroupId']
-
-        # Delete SG
         ec2.delete_security_group(GroupId=sg_id)
         print(f"✅ Deleted security group '{sg_name}' (ID: {sg_id})")
     except ClientError as e:
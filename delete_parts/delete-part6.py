@@ -0,0 +1,77 @@
+import os
+import sys
+import boto3
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inventory import Inventory, SECURITY_GROUP
+
+# ---------------- AWS Session Setup ----------------
+session = boto3.session.Session(profile_name="boto3-user", region_name="us-east-1")
+elasticache = session.client('elasticache')
+ec2 = session.client('ec2')
+ssm = session.client('ssm')
+
+# ---------------- Parameters ----------------
+vpc_id = 'vpc-03225bf494db6ecc2'
+replication_group_id = 'cachetier-redis'
+cache_subnet_group_name = 'cache-tier-subnet-group'
+cache_sg_name = 'CacheTierSG'
+endpoint_parameter_name = '/company/cache-tier/endpoint'
+
+# ---------------- Delete Redis Replication Group ----------------
+try:
+    print(f"🔄 Deleting Redis replication group '{replication_group_id}'...")
+    elasticache.delete_replication_group(
+        ReplicationGroupId=replication_group_id,
+        RetainPrimaryCluster=False
+    )
+    print(f"✅ Replication group '{replication_group_id}' deletion initiated.")
+except ClientError as e:
+    if "ReplicationGroupNotFoundFault" in e.response['Error']['Code']:
+        print(f"ℹ️ Replication group '{replication_group_id}' already deleted.")
+    else:
+        print("❌ Failed to delete replication group:", e.response['Error']['Message'])
+
+# ---------------- Wait for deletion to complete ----------------
+print("⏳ Waiting for the replication group to be fully deleted...")
+waiter = elasticache.get_waiter('replication_group_deleted')
+try:
+    waiter.wait(ReplicationGroupId=replication_group_id)
+    print(f"✅ Replication group '{replication_group_id}' has been deleted.")
+except ClientError as e:
+    print("❌ Error while waiting for replication group deletion:", e.response['Error']['Message'])
+
+# ---------------- Delete Cache Subnet Group ----------------
+try:
+    elasticache.delete_cache_subnet_group(CacheSubnetGroupName=cache_subnet_group_name)
+    print(f"✅ Deleted cache subnet group: {cache_subnet_group_name}")
+except ClientError as e:
+    if "CacheSubnetGroupNotFoundFault" in e.response['Error']['Code']:
+        print(f"ℹ️ Cache subnet group '{cache_subnet_group_name}' already deleted.")
+    else:
+        print("❌ Failed to delete cache subnet group:", e.response['Error']['Message'])
+
+# ---------------- Delete Cache Security Group ----------------
+cache_sg = Inventory(session).refresh([SECURITY_GROUP]).get(SECURITY_GROUP, cache_sg_name, vpc_id=vpc_id)
+if cache_sg:
+    try:
+        ec2.delete_security_group(GroupId=cache_sg['id'])
+        print(f"✅ Deleted security group '{cache_sg_name}' (ID: {cache_sg['id']})")
+    except ClientError as e:
+        if "DependencyViolation" in e.response['Error']['Code']:
+            print(f"⚠️ Security group '{cache_sg_name}' is still attached to some resource.")
+        else:
+            print(f"❌ Failed to delete security group '{cache_sg_name}':", e.response['Error']['Message'])
+else:
+    print(f"ℹ️ Security group '{cache_sg_name}' already deleted.")
+
+# ---------------- Delete exported endpoint ----------------
+try:
+    ssm.delete_parameter(Name=endpoint_parameter_name)
+    print(f"✅ Deleted SSM parameter '{endpoint_parameter_name}'")
+except ClientError as e:
+    if "ParameterNotFound" in e.response['Error']['Code']:
+        print(f"ℹ️ SSM parameter '{endpoint_parameter_name}' already deleted.")
+    else:
+        print("❌ Failed to delete SSM parameter:", e.response['Error']['Message'])
@@ -0,0 +1,136 @@
+import time
+from botocore.exceptions import ClientError
+
+# ---------------- Rolling Instance Refresh ----------------
+# Publishes a new launch template version and rolls the ASG onto it with an
+# instance refresh instead of deleting and recreating the group. The ASGs
+# track '$Default', which AutoRollback refuses, so for the refresh the group is
+# pinned to the version number it is running and afterwards put back on
+# '$Default'. The new version only becomes the default once the refresh
+# succeeds, so a rollback keeps launching the previous version.
+
+REFRESH_DONE = ('Successful', 'Failed', 'Cancelled', 'RollbackSuccessful', 'RollbackFailed')
+
+
+def create_template_version(ec2, launch_template_name, launch_template_data, description):
+    response = ec2.create_launch_template_version(
+        LaunchTemplateName=launch_template_name,
+        VersionDescription=description,
+        LaunchTemplateData=launch_template_data
+    )
+    version = response['LaunchTemplateVersion']['VersionNumber']
+    print(f"✅ Launch template '{launch_template_name}' version {version} created.")
+    return version
+
+
+def desired_configuration(autoscaling, asg_name, launch_template_name, version):
+    spec = {'LaunchTemplateName': launch_template_name, 'Version': str(version)}
+    group = autoscaling.describe_auto_scaling_groups(
+        AutoScalingGroupNames=[asg_name]
+    )['AutoScalingGroups'][0]
+    if 'MixedInstancesPolicy' in group:
+        policy = group['MixedInstancesPolicy']
+        policy['LaunchTemplate']['LaunchTemplateSpecification'] = spec
+        return {'MixedInstancesPolicy': policy}
+    return {'LaunchTemplate': spec}
+
+
+def pin_running_version(ec2, autoscaling, asg_name, launch_template_name):
+    # AutoRollback needs an explicit version to return to, not '$Default'/'$Latest'
+    version = ec2.describe_launch_template_versions(
+        LaunchTemplateName=launch_template_name,
+        Versions=['$Default']
+    )['LaunchTemplateVersions'][0]['VersionNumber']
+    configuration = desired_configuration(autoscaling, asg_name, launch_template_name, version)
+    autoscaling.update_auto_scaling_group(AutoScalingGroupName=asg_name, **configuration)
+    print(f"📌 '{asg_name}' pinned to launch template version {version} for the refresh.")
+    return version
+
+
+def track_default(autoscaling, asg_name, launch_template_name):
+    # The refresh pinned the group to a version number, point it back at '$Default'
+    configuration = desired_configuration(autoscaling, asg_name, launch_template_name, '$Default')
+    autoscaling.update_auto_scaling_group(AutoScalingGroupName=asg_name, **configuration)
+
+
+def stop_refresh(autoscaling, asg_name):
+    try:
+        autoscaling.rollback_instance_refresh(AutoScalingGroupName=asg_name)
+        print("↩️ Instance refresh rolled back.")
+    except ClientError:
+        try:
+            autoscaling.cancel_instance_refresh(AutoScalingGroupName=asg_name)
+            print("⏹️ Instance refresh cancelled.")
+        except ClientError as e:
+            print("⚠️ Could not stop the instance refresh:", e.response['Error']['Message'])
+
+
+def start_refresh(autoscaling, asg_name, configuration, min_healthy_percentage=90,
+                  checkpoints=(50, 100), checkpoint_delay=300, skip_matching=True, instance_warmup=300):
+    preferences = {
+        'MinHealthyPercentage': min_healthy_percentage,
+        'SkipMatching': skip_matching,
+        'InstanceWarmup': instance_warmup,
+        'AutoRollback': True
+    }
+    if checkpoints:
+        preferences['CheckpointPercentages'] = list(checkpoints)
+        preferences['CheckpointDelay'] = checkpoint_delay
+    response = autoscaling.start_instance_refresh(
+        AutoScalingGroupName=asg_name,
+        Strategy='Rolling',
+        DesiredConfiguration=configuration,
+        Preferences=preferences
+    )
+    refresh_id = response['InstanceRefreshId']
+    print(f"🔄 Instance refresh {refresh_id} started on '{asg_name}'.")
+    return refresh_id
+
+
+def follow_refresh(autoscaling, asg_name, refresh_id, poll_seconds=15, timeout=None):
+    deadline = time.time() + timeout if timeout else None
+    last = None
+    while True:
+        refresh = autoscaling.describe_instance_refreshes(
+            AutoScalingGroupName=asg_name,
+            InstanceRefreshIds=[refresh_id]
+        )['InstanceRefreshes'][0]
+        state = (refresh['Status'], refresh.get('PercentageComplete', 0), refresh.get('InstancesToUpdate'))
+        if state != last:
+            print(f"   {refresh['Status']}: {state[1]}% complete, {state[2]} instance(s) left"
+                  + (f" - {refresh['StatusReason']}" if refresh.get('StatusReason') else ""))
+            last = state
+        if refresh['Status'] in REFRESH_DONE:
+            return refresh['Status']
+        if deadline and time.time() > deadline and not refresh['Status'].startswith('Rollback'):
+            print("⏰ Instance refresh timed out, rolling back...")
+            autoscaling.rollback_instance_refresh(AutoScalingGroupName=asg_name)
+            deadline = None
+        time.sleep(poll_seconds)
+
+
+def roll_out(ec2, autoscaling, launch_template_name, launch_template_data, asg_name, description,
+             timeout=3600, **preferences):
+    refresh_id = None
+    try:
+        previous = pin_running_version(ec2, autoscaling, asg_name, launch_template_name)
+        version = create_template_version(ec2, launch_template_name, launch_template_data, description)
+        configuration = desired_configuration(autoscaling, asg_name, launch_template_name, version)
+        refresh_id = start_refresh(autoscaling, asg_name, configuration, **preferences)
+        status = follow_refresh(autoscaling, asg_name, refresh_id, timeout=timeout)
+        if status == 'Successful':
+            ec2.modify_launch_template(LaunchTemplateName=launch_template_name, DefaultVersion=str(version))
+        # Successful: '$Default' is the new version; rolled back: it is still the previous one
+        track_default(autoscaling, asg_name, launch_template_name)
+    except ClientError as e:
+        print("❌ Rolling deploy failed:", e.response['Error']['Message'])
+        if refresh_id:
+            stop_refresh(autoscaling, asg_name)
+            print(f"ℹ️ '{asg_name}' stays pinned to version {previous}, the current default, until the next deploy.")
+        return False
+
+    if status == 'Successful':
+        print(f"✅ '{asg_name}' is running launch template version {version}.")
+        return True
+    print(f"❌ Rolling deploy ended with status {status}.")
+    return False
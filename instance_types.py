@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import time
+
+# ---------------- Instance Type Selector ----------------
+# Ranks the current-generation instance types of a region for use as
+# MixedInstancesPolicy overrides. describe_instance_types is slow (dozens of
+# pages), so the reduced catalog is cached locally per region. Offerings differ
+# per Availability Zone and are always fetched live for the ASG's subnets.
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.instance_types_cache')
+CACHE_MAX_AGE = 7 * 24 * 3600  # seconds
+
+# Rough sustained Gbps for the descriptive network performance levels
+NETWORK_LEVELS = {
+    'Very Low': 0.05,
+    'Low': 0.1,
+    'Low to Moderate': 0.3,
+    'Moderate': 0.5,
+    'High': 1.0,
+}
+
+
+def network_gbps(performance):
+    if performance in NETWORK_LEVELS:
+        return NETWORK_LEVELS[performance]
+    match = re.search(r'([\d.]+)\s*Gigabit', performance)
+    if not match:
+        return 0.0
+    gbps = float(match.group(1))
+    # "Up to N Gigabit" is a burst ceiling, the baseline is much lower
+    return gbps / 2 if performance.startswith('Up to') else gbps
+
+
+def fetch_instance_types(ec2):
+    catalog = []
+    paginator = ec2.get_paginator('describe_instance_types')
+    pages = paginator.paginate(Filters=[{'Name': 'current-generation', 'Values': ['true']}])
+    for page in pages:
+        for item in page['InstanceTypes']:
+            catalog.append({
+                'InstanceType': item['InstanceType'],
+                'VCpus': item['VCpuInfo']['DefaultVCpus'],
+                'MemoryMiB': item['MemoryInfo']['SizeInMiB'],
+                'Architectures': item['ProcessorInfo']['SupportedArchitectures'],
+                'NetworkPerformance': item['NetworkInfo']['NetworkPerformance'],
+                'UsageClasses': item.get('SupportedUsageClasses', []),
+                'Burstable': item.get('BurstablePerformanceSupported', False),
+                'Hypervisor': item.get('Hypervisor', ''),
+            })
+    return catalog
+
+
+def load_instance_types(ec2, refresh=False):
+    region = ec2.meta.region_name
+    cache_file = os.path.join(CACHE_DIR, f"{region}.json")
+    if not refresh and os.path.exists(cache_file):
+        with open(cache_file) as f:
+            cached = json.load(f)
+        if time.time() - cached['fetched_at'] < CACHE_MAX_AGE:
+            return cached['instance_types']
+
+    catalog = fetch_instance_types(ec2)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache_file, 'w') as f:
+        json.dump({'fetched_at': time.time(), 'instance_types': catalog}, f)
+    print(f"📦 Cached {len(catalog)} instance types for {region} in {cache_file}")
+    return catalog
+
+
+def offered_in_subnets(ec2, subnet_ids):
+    # Instance types offered in every Availability Zone the subnets are in
+    zones = {s['AvailabilityZone'] for s in ec2.describe_subnets(SubnetIds=subnet_ids)['Subnets']}
+    offered = {}
+    pages = ec2.get_paginator('describe_instance_type_offerings').paginate(
+        LocationType='availability-zone', Filters=[{'Name': 'location', 'Values': sorted(zones)}])
+    for page in pages:
+        for offering in page['InstanceTypeOfferings']:
+            offered.setdefault(offering['InstanceType'], set()).add(offering['Location'])
+    return {instance_type for instance_type, locations in offered.items() if locations == zones}
+
+
+def select_instance_types(ec2, min_vcpus=2, max_vcpus=4, min_memory_gib=4, architecture='x86_64',
+                          allow_burstable=False, spot=True, count=4, refresh=False, subnet_ids=None):
+    offered = offered_in_subnets(ec2, subnet_ids) if subnet_ids else None
+    candidates = []
+    for item in load_instance_types(ec2, refresh):
+        if offered is not None and item['InstanceType'] not in offered:
+            continue
+        if architecture not in item['Architectures']:
+            continue
+        if not min_vcpus <= item['VCpus'] <= max_vcpus:
+            continue
+        if item['MemoryMiB'] < min_memory_gib * 1024:
+            continue
+        if item['Burstable'] and not allow_burstable:
+            continue
+        if spot and 'spot' not in item['UsageClasses']:
+            continue
+        candidates.append(item)
+
+    # Smallest shape that fits first, then the best network, Nitro before Xen
+    candidates.sort(key=lambda item: (
+        item['VCpus'],
+        item['MemoryMiB'],
+        -network_gbps(item['NetworkPerformance']),
+        item['Hypervisor'] != 'nitro',
+        item['InstanceType'],
+    ))
+    return [item['InstanceType'] for item in candidates[:count]]
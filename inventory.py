@@ -0,0 +1,177 @@
+from collections import defaultdict
+
+# ---------------- Tag-Based Inventory ----------------
+# One paginated Resource Groups Tagging API scan, plus paginated describes for
+# resources the tagging API misses (never tagged, or not supported by it),
+# streamed into an in-memory index. Lookups by resource type and name are
+# dictionary hits with no further API calls.
+
+SECURITY_GROUP = 'ec2:security-group'
+LAUNCH_TEMPLATE = 'ec2:launch-template'
+LOAD_BALANCER = 'elasticloadbalancing:loadbalancer'
+TARGET_GROUP = 'elasticloadbalancing:targetgroup'
+AUTO_SCALING_GROUP = 'autoscaling:autoScalingGroup'
+DB_INSTANCE = 'rds:db'
+DB_SUBNET_GROUP = 'rds:subgrp'
+
+
+# ---------------- ARN Parsing ----------------
+def parse_arn(arn):
+    # -> (resource type, id, name derived from the ARN or None)
+    service, resource = arn.split(':', 5)[2], arn.split(':', 5)[5]
+    if service == 'elasticloadbalancing':
+        kind, name = resource.split('/')[0], resource.split('/')[-2]
+        return f"{service}:{kind}", arn, name
+    if service == 'autoscaling':
+        name = resource.split('autoScalingGroupName/')[-1]
+        return AUTO_SCALING_GROUP, name, name
+    if '/' in resource:
+        kind, resource_id = resource.split('/', 1)
+        return f"{service}:{kind}", resource_id, None
+    if ':' not in resource:
+        # e.g. arn:aws:s3:::bucket or arn:aws:sns:region:account:topic
+        return service, resource, None
+    kind, resource_id = resource.split(':', 1)
+    name = resource_id if service in ('rds', 'elasticache') else None
+    return f"{service}:{kind}", resource_id, name
+
+
+# ---------------- Describe Supplements ----------------
+def security_group_record(item):
+    return {'id': item['GroupId'], 'name': item['GroupName'], 'vpc_id': item.get('VpcId'),
+            'tags': item.get('Tags', [])}
+
+
+def launch_template_record(item):
+    return {'id': item['LaunchTemplateId'], 'name': item['LaunchTemplateName'], 'tags': item.get('Tags', [])}
+
+
+def load_balancer_record(item):
+    return {'id': item['LoadBalancerArn'], 'name': item['LoadBalancerName'], 'vpc_id': item.get('VpcId'),
+            'dns_name': item.get('DNSName')}
+
+
+def target_group_record(item):
+    return {'id': item['TargetGroupArn'], 'name': item['TargetGroupName'], 'vpc_id': item.get('VpcId'),
+            'load_balancer_arns': item.get('LoadBalancerArns', [])}
+
+
+def auto_scaling_group_record(item):
+    template = item.get('LaunchTemplate') or item.get('MixedInstancesPolicy', {}).get('LaunchTemplate', {}).get(
+        'LaunchTemplateSpecification', {})
+    return {'id': item['AutoScalingGroupName'], 'name': item['AutoScalingGroupName'],
+            'subnet_ids': [s for s in item.get('VPCZoneIdentifier', '').split(',') if s],
+            'launch_template': template.get('LaunchTemplateName'),
+            'tags': [{'Key': t['Key'], 'Value': t['Value']} for t in item.get('Tags', [])]}
+
+
+def db_instance_record(item):
+    return {'id': item['DBInstanceIdentifier'], 'name': item['DBInstanceIdentifier'],
+            'vpc_id': item.get('DBSubnetGroup', {}).get('VpcId'), 'tags': item.get('TagList', [])}
+
+
+def db_subnet_group_record(item):
+    return {'id': item['DBSubnetGroupName'], 'name': item['DBSubnetGroupName'], 'vpc_id': item.get('VpcId')}
+
+
+# resource type -> (client, paginated operation, result key, record builder)
+DESCRIBES = {
+    SECURITY_GROUP: ('ec2', 'describe_security_groups', 'SecurityGroups', security_group_record),
+    LAUNCH_TEMPLATE: ('ec2', 'describe_launch_templates', 'LaunchTemplates', launch_template_record),
+    LOAD_BALANCER: ('elbv2', 'describe_load_balancers', 'LoadBalancers', load_balancer_record),
+    TARGET_GROUP: ('elbv2', 'describe_target_groups', 'TargetGroups', target_group_record),
+    AUTO_SCALING_GROUP: ('autoscaling', 'describe_auto_scaling_groups', 'AutoScalingGroups',
+                         auto_scaling_group_record),
+    DB_INSTANCE: ('rds', 'describe_db_instances', 'DBInstances', db_instance_record),
+    DB_SUBNET_GROUP: ('rds', 'describe_db_subnet_groups', 'DBSubnetGroups', db_subnet_group_record),
+}
+
+
+class Inventory:
+    def __init__(self, session):
+        self.session = session
+        self.clients = {}
+        self.resources = {}  # (type, id) -> record
+        self.by_name = defaultdict(set)  # (type, name) -> keys
+        self.by_type = defaultdict(set)  # type -> keys
+        self.scanned = set()  # types loaded by refresh()
+
+    def client(self, service):
+        if service not in self.clients:
+            self.clients[service] = self.session.client(service)
+        return self.clients[service]
+
+    # ---------------- Indexing ----------------
+    def add(self, resource_type, record):
+        record = {k: v for k, v in record.items() if v is not None}
+        key = (resource_type, record['id'])
+        existing = self.resources.get(key)
+        if existing:
+            self.unindex(key)
+            record = {**existing, **record, 'tags': record.get('tags') or existing.get('tags', [])}
+        tags = {t['Key']: t['Value'] for t in record.get('tags', [])}
+        record.update(type=resource_type, tag_map=tags)
+        record['name'] = record.get('name') or tags.get('Name')
+
+        self.resources[key] = record
+        self.by_type[resource_type].add(key)
+        for name in {record['name'], tags.get('Name')} - {None}:
+            self.by_name[(resource_type, name)].add(key)
+
+    def unindex(self, key):
+        record = self.resources.pop(key)
+        self.by_type[record['type']].discard(key)
+        for name in {record['name'], record['tag_map'].get('Name')} - {None}:
+            self.by_name[(record['type'], name)].discard(key)
+
+    # ---------------- Scanning ----------------
+    def scan_tags(self, resource_types=None):
+        kwargs = {'ResourcesPerPage': 100}
+        if resource_types:
+            # Auto Scaling groups are not served by the tagging API, the describe covers them
+            tag_types = sorted(set(resource_types) - {AUTO_SCALING_GROUP})
+            if not tag_types:
+                return
+            kwargs['ResourceTypeFilters'] = tag_types
+        paginator = self.client('resourcegroupstaggingapi').get_paginator('get_resources')
+        for page in paginator.paginate(**kwargs):
+            for item in page['ResourceTagMappingList']:
+                resource_type, resource_id, name = parse_arn(item['ResourceARN'])
+                if resource_types and resource_type not in resource_types:
+                    continue
+                self.add(resource_type, {'id': resource_id, 'arn': item['ResourceARN'], 'name': name,
+                                         'tags': item.get('Tags', [])})
+
+    def scan_describes(self, resource_types=None):
+        for resource_type, (service, operation, key, build) in DESCRIBES.items():
+            if resource_types and resource_type not in resource_types:
+                continue
+            for page in self.client(service).get_paginator(operation).paginate():
+                for item in page[key]:
+                    self.add(resource_type, build(item))
+
+    def refresh(self, resource_types=None):
+        # Incremental when resource_types is given: only those types are rescanned
+        stale = [key for key in self.resources if not resource_types or key[0] in resource_types]
+        for key in stale:
+            self.unindex(key)
+        self.scan_tags(resource_types)
+        self.scan_describes(resource_types)
+        self.scanned.update(resource_types or DESCRIBES)
+        return self
+
+    def ensure(self, resource_types):
+        # Scans only the types no earlier refresh() loaded, for lookups that are not always needed
+        missing = [t for t in resource_types if t not in self.scanned]
+        return self.refresh(missing) if missing else self
+
+    # ---------------- Lookups ----------------
+    def get(self, resource_type, name, vpc_id=None):
+        for key in self.by_name.get((resource_type, name), ()):
+            record = self.resources[key]
+            if vpc_id is None or record.get('vpc_id') in (None, vpc_id):
+                return record
+        return None
+
+    def of_type(self, resource_type):
+        return [self.resources[key] for key in self.by_type.get(resource_type, ())]
@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+import time
+from botocore.exceptions import ClientError, WaiterError
+
+# ---------------- Provisioning Journal ----------------
+# Append-only JSON-lines log of every provisioning step (inputs, returned IDs,
+# status). Running a script with --resume replays the last run: steps that
+# completed with the same inputs are checked with a cheap describe and
+# skipped, and provisioning continues from the first incomplete step.
+
+JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.journal')
+
+
+class StepFailed(Exception):
+    pass
+
+
+class Journal:
+    def __init__(self, name, resume=None):
+        self.path = os.path.join(JOURNAL_DIR, f"{name}.jsonl")
+        self.resume = '--resume' in sys.argv if resume is None else resume
+        self.done = {}  # step -> entry of the last completed attempt in the resumed run
+        if self.resume:
+            self.load()
+        else:
+            self.write({'event': 'run'})
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry['event'] == 'run':
+                    self.done = {}
+                elif entry['event'] == 'done':
+                    self.done[entry['step']] = entry
+                elif entry['event'] == 'failed':
+                    self.done.pop(entry['step'], None)
+        print(f"📒 Resuming from {self.path}: {len(self.done)} step(s) already completed.")
+
+    def write(self, entry):
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        entry['time'] = time.time()
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(entry, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def step(self, name, inputs, run, verify=None):
+        previous = self.done.get(name)
+        if previous and previous['inputs'] == json.loads(json.dumps(inputs, default=str)):
+            outputs = previous['outputs']
+            try:
+                still_there = verify(outputs) if verify else True
+            except (ClientError, WaiterError):
+                still_there = False
+            if still_there:
+                print(f"⏭️ {name}: already completed, skipping.")
+                return outputs
+            print(f"🔁 {name}: journal entry is stale, running it again.")
+
+        self.write({'event': 'started', 'step': name, 'inputs': inputs})
+        try:
+            outputs = run()
+        except (ClientError, WaiterError, StepFailed) as e:
+            message = e.response['Error']['Message'] if isinstance(e, ClientError) else str(e)
+            self.write({'event': 'failed', 'step': name, 'inputs': inputs, 'error': message})
+            print(f"❌ {name} failed: {message}")
+            print("   Fix the cause and rerun with --resume to continue from this step.")
+            exit(1)
+        entry = {'event': 'done', 'step': name, 'inputs': inputs, 'outputs': outputs}
+        self.write(entry)
+        self.done[name] = json.loads(json.dumps(entry, default=str))
+        return outputs
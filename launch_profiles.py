@@ -0,0 +1,154 @@
+from botocore.exceptions import ClientError
+
+# ---------------- Launch Template Profiles ----------------
+# Adds the settings the base LaunchTemplateData leaves at their defaults: gp3
+# root volume with explicit IOPS/throughput, EBS optimization, detailed
+# monitoring, IMDSv2 metadata options, a spread or partition placement group
+# and unlimited CPU credits on burstable types. Options the instance type does
+# not support (EBS optimization on t2, credits on non-burstable types) are
+# left out instead of failing the launch. Profiles are meant for Nitro types;
+# a Xen type (t2, m4, ...) is rejected unless allow_non_nitro is set.
+
+LAUNCH_PROFILES = {
+    'baseline': {},  # only ImageId, InstanceType, KeyName, SecurityGroupIds and UserData
+    'general': {
+        'root_volume': {'VolumeSize': 20, 'Iops': 3000, 'Throughput': 125},
+        'detailed_monitoring': True,
+        'placement': 'spread',
+        'cpu_credits': 'unlimited',
+    },
+    'io-heavy': {
+        'root_volume': {'VolumeSize': 50, 'Iops': 6000, 'Throughput': 250},
+        'detailed_monitoring': True,
+        'placement': 'partition',
+        'partition_count': 2,
+        'cpu_credits': 'unlimited',
+    },
+}
+
+METADATA_OPTIONS = {
+    'HttpEndpoint': 'enabled',
+    'HttpTokens': 'required',  # IMDSv2 only
+    'HttpPutResponseHopLimit': 2
+}
+
+# Values describe_launch_template_versions fills in for settings the request left out
+AWS_DEFAULTS = {
+    'EbsOptimized': False,
+    'DisableApiTermination': False,
+    'Monitoring.Enabled': False,
+    'MetadataOptions.HttpEndpoint': 'enabled',
+    'MetadataOptions.HttpProtocolIpv6': 'disabled',
+    'MetadataOptions.InstanceMetadataTags': 'disabled',
+    'Placement.Tenancy': 'default',
+    'BlockDeviceMappings[].Ebs.DeleteOnTermination': True,
+}
+
+
+def instance_type_info(ec2, instance_type):
+    item = ec2.describe_instance_types(InstanceTypes=[instance_type])['InstanceTypes'][0]
+    return {
+        'ebs_optimized': item['EbsInfo']['EbsOptimizedSupport'],  # 'default', 'supported' or 'unsupported'
+        'burstable': item.get('BurstablePerformanceSupported', False),
+        'nitro': item.get('Hypervisor') == 'nitro',
+    }
+
+
+def root_device_name(ec2, ami_id):
+    return ec2.describe_images(ImageIds=[ami_id])['Images'][0]['RootDeviceName']
+
+
+def ensure_placement_group(ec2, name, strategy, partition_count=None):
+    options = {'GroupName': name, 'Strategy': strategy}
+    if strategy == 'partition':
+        options['PartitionCount'] = partition_count
+    try:
+        ec2.create_placement_group(**options)
+        print(f"✅ Placement group created: {name} ({strategy})")
+    except ClientError as e:
+        if 'Duplicate' not in e.response['Error']['Code']:
+            raise
+        print(f"ℹ️ Placement group {name} already exists.")
+
+
+def apply_profile(ec2, launch_template_data, profile_name, placement_group_name, allow_non_nitro=False):
+    profile = LAUNCH_PROFILES[profile_name]
+    data = dict(launch_template_data)
+    if not profile:
+        return data
+
+    info = instance_type_info(ec2, data['InstanceType'])
+    if not info['nitro']:
+        if not allow_non_nitro:
+            raise ValueError(f"{data['InstanceType']} is not a Nitro type, the '{profile_name}' profile needs "
+                             f"t3/m6i/m7i or newer (or allow_non_nitro=True to apply it anyway)")
+        print(f"⚠️ {data['InstanceType']} is not a Nitro type, EBS and network throughput trail t3/m6i/m7i.")
+
+    if 'root_volume' in profile:
+        data['BlockDeviceMappings'] = [{
+            'DeviceName': root_device_name(ec2, data['ImageId']),
+            'Ebs': {'VolumeType': 'gp3', 'DeleteOnTermination': True, 'Encrypted': True, **profile['root_volume']}
+        }]
+    if info['ebs_optimized'] != 'unsupported':
+        data['EbsOptimized'] = True
+    if profile.get('detailed_monitoring'):
+        data['Monitoring'] = {'Enabled': True}
+    data['MetadataOptions'] = dict(METADATA_OPTIONS)
+    if profile.get('placement'):
+        ensure_placement_group(ec2, placement_group_name, profile['placement'], profile.get('partition_count'))
+        data['Placement'] = {'GroupName': placement_group_name}
+    if profile.get('cpu_credits') and info['burstable']:
+        data['CreditSpecification'] = {'CpuCredits': profile['cpu_credits']}
+    return data
+
+
+# ---------------- Diff against the current version ----------------
+def normalize(value, path=''):
+    # Drops AWS-filled defaults and empty settings and sorts ID lists, so both sides compare like for like
+    if isinstance(value, dict):
+        data = {}
+        for key, item in value.items():
+            key_path = f"{path}.{key}" if path else key
+            item = normalize(item, key_path)
+            if item in ({}, []) or (key_path in AWS_DEFAULTS and AWS_DEFAULTS[key_path] == item):
+                continue
+            data[key] = item
+        return data
+    if isinstance(value, list):
+        items = [normalize(item, f"{path}[]") for item in value]
+        if all(isinstance(item, (str, int, float)) for item in items):
+            return sorted(items)
+        return items
+    return value
+
+
+def diff(current, desired, path=''):
+    if isinstance(current, dict) and isinstance(desired, dict):
+        changes = []
+        for key in sorted(set(current) | set(desired)):
+            changes += diff(current.get(key), desired.get(key), f"{path}.{key}" if path else key)
+        return changes
+    if isinstance(current, list) and isinstance(desired, list) and len(current) == len(desired):
+        changes = []
+        for i, (old, new) in enumerate(zip(current, desired)):
+            changes += diff(old, new, f"{path}[{i}]")
+        return changes
+    return [] if current == desired else [(path, current, desired)]
+
+
+def template_changes(ec2, launch_template_name, launch_template_data):
+    current = ec2.describe_launch_template_versions(
+        LaunchTemplateName=launch_template_name,
+        Versions=['$Default']
+    )['LaunchTemplateVersions'][0]
+    return current['VersionNumber'], diff(normalize(current['LaunchTemplateData']), normalize(launch_template_data))
+
+
+def print_changes(version, changes):
+    def short(value):
+        text = str(value)
+        return text if len(text) <= 60 else text[:57] + '...'
+
+    print(f"🧾 {len(changes)} change(s) against launch template version {version}:")
+    for path, old, new in changes:
+        print(f"   {path}: {short(old)} -> {short(new)}")
@@ -0,0 +1,383 @@
+import argparse
+import ast
+import ipaddress
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------------- Pre-flight Validator ----------------
+# Checks everything Part-1..Part-6 reference before any of them creates a
+# resource: key pair, AMIs, VPC, subnets, security groups, the RDS engine
+# version and instance class, service quotas, name-length limits and CIDR
+# overlaps. IDs of one kind are batched into a single describe call and the
+# checks run concurrently, so the report comes back in a few seconds.
+
+OK, WARN, FAIL = '✅', '⚠️', '❌'
+
+# The Part scripts are the source of truth: their literal settings and the
+# create calls they make are read from the source, never copied here
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = {
+    'network': 'Part-1-Creating-a-VPC-and-Subnets.py',
+    'web_server': 'Part-2-Creating-a-Web-Server-Tier.py',
+    'web': 'Part-3-Create-lunch-template&auto-scaling-webASG.py',
+    'app': 'Part-4-Creating-an-Application-Tier.py',
+    'db': 'Part5-Created-a-Database-Tier.py',
+    'cache': 'Part6-Created-a-Cache-Tier.py',
+}
+
+# (service code, quota code) in Service Quotas
+QUOTAS = {
+    'vpcs': ('vpc', 'L-F678F1CE'),
+    'elastic_ips': ('ec2', 'L-0263D0A3'),
+    'albs': ('elasticloadbalancing', 'L-53DA6B97'),
+    'asg_vcpus': ('ec2', 'L-1216C47A'),  # Running On-Demand Standard (A, C, D, H, I, M, R, T, Z) instances
+}
+STANDARD_FAMILIES = 'acdhimrtz'
+
+NAME_RULES = {
+    # kind: (max length, allowed pattern)
+    'alb': (32, r'^[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?$'),
+    'target-group': (32, r'^[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?$'),
+    'launch-template': (128, r'^[A-Za-z0-9().\-/_]+$'),
+    'db-instance': (63, r'^[a-z](?:-?[a-z0-9])*$'),
+    'replication-group': (40, r'^[a-z](?:-?[a-z0-9])*$'),
+}
+
+
+# ---------------- Stack from the Part scripts ----------------
+def script_values(tree):
+    # Module-level NAME = <literal> assignments
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                values[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+    return values
+
+
+def api_calls(tree, operation):
+    return [node for node in ast.walk(tree)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == operation]
+
+
+def keyword(call, name):
+    for kw in call.keywords:
+        if kw.arg == name:
+            return ast.literal_eval(kw.value)
+    return None
+
+
+def unique(items):
+    return list(dict.fromkeys(items))
+
+
+def load_stack():
+    trees = {}
+    for key, script in SCRIPTS.items():
+        with open(os.path.join(ROOT, script)) as f:
+            trees[key] = ast.parse(f.read(), script)
+    v = {key: script_values(tree) for key, tree in trees.items()}
+    network, web_server, web, app, db, cache = (v[k] for k in SCRIPTS)
+
+    def count(operation):
+        return sum(len(api_calls(tree, operation)) for tree in trees.values())
+
+    return {
+        'vpc_id': web['vpc_id'],
+        'vpc_cidr': network['VPC_CIDR'],
+        'subnet_cidrs': list(network['PUBLIC_SUBNETS'].values())
+                        + [c for cidrs in network['PRIVATE_SUBNETS'].values() for c in cidrs],
+        'key_pairs': unique([web_server['KEY_PAIR_NAME'], web['key_name'], app['key_name']]),
+        'amis': unique([web_server['AMI_ID'], web['ami_id'], app['ami_id']]),
+        'instance_types': unique([web_server['INSTANCE_TYPE'], web['instance_type'], app['instance_type']]),
+        'subnets': unique(web['subnet_ids'] + app['subnet_ids'] + db['subnet_ids'] + cache['subnet_ids']),
+        'security_groups': unique(web['security_group_ids'] + app['security_group_ids']),
+        'db_engine': db['engine'],
+        'db_engine_version': db['engine_version'],
+        'db_instance_class': db['db_instance_class'],
+        'web_base_name': web['base_name'],
+        'app_base_name': app['base_name'],
+        'other_names': [('launch-template', web['launch_template_name']),
+                        ('launch-template', app['launch_template_name']),
+                        ('db-instance', db['db_identifier']), ('replication-group', cache['replication_group_id'])],
+        # What a full build adds on top of current usage, counted from the create calls
+        'needs': {
+            'vpcs': count('create_vpc'),  # only applies with --skip-network
+            'elastic_ips': count('allocate_address'),
+            'albs': count('create_load_balancer'),
+            'asgs': count('create_auto_scaling_group'),
+            # (MaxSize, instance type) per ASG, sized in vCPUs once the types are described
+            'asg_max_sizes': [(keyword(call, 'MaxSize'), v[tier]['instance_type'])
+                              for tier in ('web', 'app') for call in api_calls(trees[tier], 'create_auto_scaling_group')],
+            'db_instances': count('create_db_instance'),
+        },
+    }
+
+
+# ---------------- Referenced Resources ----------------
+def check_key_pairs(ec2, stack):
+    found = {k['KeyName'] for k in ec2.describe_key_pairs(
+        Filters=[{'Name': 'key-name', 'Values': stack['key_pairs']}])['KeyPairs']}
+    return [(OK if name in found else FAIL, 'key pair', name) for name in stack['key_pairs']]
+
+
+def check_amis(ec2, stack):
+    images = {i['ImageId']: i for i in ec2.describe_images(
+        Filters=[{'Name': 'image-id', 'Values': stack['amis']}])['Images']}
+    results = []
+    for ami in stack['amis']:
+        if ami not in images:
+            results.append((FAIL, 'AMI', f"{ami} not found (AMIs are regional, or it was deregistered)"))
+        elif images[ami]['State'] != 'available':
+            results.append((FAIL, 'AMI', f"{ami} is {images[ami]['State']}"))
+        else:
+            results.append((OK, 'AMI', f"{ami} {images[ami].get('Name', '')}"))
+    return results
+
+
+def check_instance_types(ec2, stack):
+    offered = {o['InstanceType'] for o in ec2.describe_instance_type_offerings(
+        Filters=[{'Name': 'instance-type', 'Values': stack['instance_types']}])['InstanceTypeOfferings']}
+    return [(OK if t in offered else FAIL, 'instance type', f"{t} offered in {ec2.meta.region_name}")
+            for t in stack['instance_types']]
+
+
+def check_network(ec2, stack):
+    results = []
+    vpcs = ec2.describe_vpcs(Filters=[{'Name': 'vpc-id', 'Values': [stack['vpc_id']]}])['Vpcs']
+    results.append((OK if vpcs else FAIL, 'VPC', stack['vpc_id']))
+
+    subnets = {s['SubnetId']: s for s in ec2.describe_subnets(
+        Filters=[{'Name': 'subnet-id', 'Values': stack['subnets']}])['Subnets']}
+    for subnet_id in stack['subnets']:
+        subnet = subnets.get(subnet_id)
+        if not subnet:
+            results.append((FAIL, 'subnet', f"{subnet_id} not found"))
+        elif subnet['VpcId'] != stack['vpc_id']:
+            results.append((FAIL, 'subnet', f"{subnet_id} belongs to {subnet['VpcId']}"))
+        else:
+            results.append((OK, 'subnet', f"{subnet_id} {subnet['CidrBlock']} in {subnet['AvailabilityZone']}"))
+
+    groups = {g['GroupId']: g for g in ec2.describe_security_groups(
+        Filters=[{'Name': 'group-id', 'Values': stack['security_groups']}])['SecurityGroups']}
+    for group_id in stack['security_groups']:
+        group = groups.get(group_id)
+        if not group:
+            results.append((FAIL, 'security group', f"{group_id} not found"))
+        elif group['VpcId'] != stack['vpc_id']:
+            results.append((FAIL, 'security group', f"{group_id} belongs to {group['VpcId']}"))
+        else:
+            results.append((OK, 'security group', f"{group_id} {group['GroupName']}"))
+    return results
+
+
+def check_rds_engine(rds, stack):
+    engine, version = stack['db_engine'], stack['db_engine_version']
+    versions = rds.describe_db_engine_versions(Engine=engine, EngineVersion=version)['DBEngineVersions']
+    if not versions:
+        return [(FAIL, 'RDS engine', f"{engine} {version} is not offered in this region")]
+    options = rds.describe_orderable_db_instance_options(
+        Engine=engine, EngineVersion=version, DBInstanceClass=stack['db_instance_class'], MaxRecords=20
+    )['OrderableDBInstanceOptions']
+    return [(OK, 'RDS engine', f"{engine} {version}"),
+            (OK if options else FAIL, 'RDS instance class', f"{stack['db_instance_class']} for {engine} {version}")]
+
+
+# ---------------- Quotas ----------------
+def quota_value(quotas, service, code):
+    try:
+        return quotas.get_service_quota(ServiceCode=service, QuotaCode=code)['Quota']['Value']
+    except quotas.exceptions.NoSuchResourceException:
+        return quotas.get_aws_default_service_quota(ServiceCode=service, QuotaCode=code)['Quota']['Value']
+
+
+def standard_vcpus_in_use(ec2):
+    vcpus = 0
+    pages = ec2.get_paginator('describe_instances').paginate(
+        Filters=[{'Name': 'instance-state-name', 'Values': ['pending', 'running']}])
+    for page in pages:
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                if instance.get('InstanceLifecycle') == 'spot' or instance['InstanceType'][0] not in STANDARD_FAMILIES:
+                    continue
+                cpu = instance['CpuOptions']
+                vcpus += cpu['CoreCount'] * cpu['ThreadsPerCore']
+    return vcpus
+
+
+def list_vpcs(ec2):
+    return [vpc for page in ec2.get_paginator('describe_vpcs').paginate() for vpc in page['Vpcs']]
+
+
+def asg_vcpus_needed(ec2, max_sizes):
+    types = {t['InstanceType']: t['VCpuInfo']['DefaultVCpus'] for t in ec2.describe_instance_types(
+        InstanceTypes=sorted({instance_type for _, instance_type in max_sizes}))['InstanceTypes']}
+    return sum(max_size * types[instance_type] for max_size, instance_type in max_sizes)
+
+
+def count_albs(elbv2):
+    return sum(1 for page in elbv2.get_paginator('describe_load_balancers').paginate()
+               for lb in page['LoadBalancers'] if lb['Type'] == 'application')
+
+
+def quota_result(name, used, limit, needed):
+    message = f"{used:.0f} used + {needed} needed of {limit:.0f}"
+    if used + needed > limit:
+        return FAIL, f"quota: {name}", message
+    if used + needed > 0.8 * limit:
+        return WARN, f"quota: {name}", message
+    return OK, f"quota: {name}", message
+
+
+def check_quota(quotas, name, usage, needed):
+    service, code = QUOTAS[name]
+    return [quota_result(name, usage(), quota_value(quotas, service, code), needed)]
+
+
+def check_asg_quota(autoscaling, needed):
+    limits = autoscaling.describe_account_limits()
+    return [quota_result('asgs', limits['NumberOfAutoScalingGroups'], limits['MaxNumberOfAutoScalingGroups'], needed)]
+
+
+def check_rds_quota(rds, needed):
+    for quota in rds.describe_account_attributes()['AccountQuotas']:
+        if quota['AccountQuotaName'] == 'DBInstances':
+            return [quota_result('db_instances', quota['Used'], quota['Max'], needed)]
+    return []
+
+
+# ---------------- Offline Checks ----------------
+def planned_names(stack):
+    # (kind, untruncated name, name the Part scripts actually use)
+    names = []
+    for base_name in (stack['web_base_name'], stack['app_base_name']):
+        full = base_name.replace(" ", "-")
+        sanitized = full[:28]
+        names += [('alb', f"{full}-LB", f"{sanitized}-LB"[:32]),
+                  ('target-group', f"{full}-TG", f"{sanitized}-TG")]
+    sanitized = stack['web_base_name'].replace(" ", "-")[:28]
+    names += [('target-group', f"{sanitized}-{colour}", f"{sanitized[:24]}-{colour}") for colour in ('green', 'blue')]
+    return names + [(kind, name, name) for kind, name in stack['other_names']]
+
+
+def check_names(stack):
+    results = []
+    used = {}
+    for kind, wanted, actual in planned_names(stack):
+        max_length, pattern = NAME_RULES[kind]
+        if len(actual) > max_length or not re.match(pattern, actual):
+            results.append((FAIL, f"name: {kind}", f"'{actual}' breaks the {max_length}-char/charset rule"))
+            continue
+        if (kind, actual) in used:
+            results.append((FAIL, f"name: {kind}", f"'{wanted}' and '{used[(kind, actual)]}' both become '{actual}'"))
+            continue
+        used[(kind, actual)] = wanted
+        if wanted != actual:
+            results.append((WARN, f"name: {kind}", f"'{wanted}' is truncated to '{actual}'"))
+        else:
+            results.append((OK, f"name: {kind}", actual))
+    return results
+
+
+def check_cidrs(stack):
+    vpc = ipaddress.ip_network(stack['vpc_cidr'])
+    subnets = [ipaddress.ip_network(c) for c in stack['subnet_cidrs']]
+    results = []
+    for subnet in subnets:
+        if not subnet.subnet_of(vpc):
+            results.append((FAIL, 'CIDR', f"{subnet} is outside the VPC {vpc}"))
+    for i, a in enumerate(subnets):
+        for b in subnets[i + 1:]:
+            if a.overlaps(b):
+                results.append((FAIL, 'CIDR', f"subnets {a} and {b} overlap"))
+    if not results:
+        results.append((OK, 'CIDR', f"{len(subnets)} subnets inside {vpc}, no overlaps"))
+    return results
+
+
+def check_vpc_overlaps(ec2, stack):
+    # Overlapping VPCs cannot be peered or share a transit gateway later
+    vpc = ipaddress.ip_network(stack['vpc_cidr'])
+    results = []
+    for other in list_vpcs(ec2):
+        if other['VpcId'] == stack['vpc_id']:
+            continue
+        for block in other.get('CidrBlockAssociationSet', []):
+            if vpc.overlaps(ipaddress.ip_network(block['CidrBlock'])):
+                results.append((WARN, 'CIDR', f"{vpc} overlaps {other['VpcId']} ({block['CidrBlock']})"))
+    return results or [(OK, 'CIDR', f"{vpc} does not overlap other VPCs")]
+
+
+# ---------------- Report ----------------
+def run_checks(checks, workers=16):
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(check) for name, check in checks.items()}
+        for name, future in futures.items():
+            try:
+                results += future.result()
+            except Exception as e:  # one broken check (e.g. missing permission) must not hide the others
+                message = e.response['Error']['Message'] if hasattr(e, 'response') else str(e)
+                results.append((WARN, name, f"could not run: {message}"))
+    return results
+
+
+def print_report(results, elapsed):
+    for status, check, message in results:
+        print(f"{status} {check:<24} {message}")
+    failed = sum(1 for r in results if r[0] == FAIL)
+    warned = sum(1 for r in results if r[0] == WARN)
+    print(f"\n{len(results)} checks in {elapsed:.1f}s: {failed} failed, {warned} warning(s)")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the stack's references and quotas before building it")
+    parser.add_argument('--skip-network', action='store_true',
+                        help="building from scratch: the VPC, subnets and security groups do not exist yet")
+    parser.add_argument('--offline', action='store_true', help="only run the name and CIDR checks")
+    args = parser.parse_args()
+
+    started = time.time()
+    stack = load_stack()
+    checks = {
+        'names': lambda: check_names(stack),
+        'cidrs': lambda: check_cidrs(stack),
+    }
+    if not args.offline:
+        import boto3
+
+        session = boto3.session.Session(profile_name="boto3-user", region_name="us-east-1")
+        # Clients are thread-safe, the session is not: create them all before the workers start
+        ec2 = session.client('ec2')
+        elbv2 = session.client('elbv2')
+        rds = session.client('rds')
+        autoscaling = session.client('autoscaling')
+        quotas = session.client('service-quotas')
+        needs = stack['needs']
+        checks.update({
+            'key pairs': lambda: check_key_pairs(ec2, stack),
+            'amis': lambda: check_amis(ec2, stack),
+            'instance types': lambda: check_instance_types(ec2, stack),
+            'rds engine': lambda: check_rds_engine(rds, stack),
+            'vpc overlaps': lambda: check_vpc_overlaps(ec2, stack),
+            'quota: vpcs': lambda: check_quota(quotas, 'vpcs', lambda: len(list_vpcs(ec2)),
+                                               needs['vpcs'] if args.skip_network else 0),
+            'quota: elastic_ips': lambda: check_quota(quotas, 'elastic_ips',
+                                                      lambda: len(ec2.describe_addresses()['Addresses']),
+                                                      needs['elastic_ips']),
+            'quota: albs': lambda: check_quota(quotas, 'albs', lambda: count_albs(elbv2), needs['albs']),
+            'quota: asg_vcpus': lambda: check_quota(quotas, 'asg_vcpus', lambda: standard_vcpus_in_use(ec2),
+                                                    asg_vcpus_needed(ec2, needs['asg_max_sizes'])),
+            'quota: asgs': lambda: check_asg_quota(autoscaling, needs['asgs']),
+            'quota: db_instances': lambda: check_rds_quota(rds, needs['db_instances']),
+        })
+        if not args.skip_network:
+            checks['network'] = lambda: check_network(ec2, stack)
+
+    results = run_checks(checks)
+    exit(0 if print_report(results, time.time() - started) else 1)
@@ -0,0 +1,202 @@
+import argparse
+import csv
+import itertools
+import json
+from datetime import datetime
+import numpy as np
+
+# ---------------- ASG Scaling Simulator ----------------
+# Replays a request-rate trace (CSV or a CloudWatch JSON export) minute by
+# minute through a model of target tracking on ASGAverageCPUUtilization:
+# scale-out after 3 breaching minutes, scale-in after 15 minutes below 90% of
+# the target and a scale-in cooldown, boot delay before an instance serves,
+# EstimatedInstanceWarmup before its CPU counts in the metric (booting
+# instances report boot_cpu) and HealthCheckGracePeriod (a grace shorter than
+# the boot means the instance is replaced before it ever serves).
+# Every parameter combination is one row of the state arrays, so a whole grid
+# is simulated in a single pass over the trace.
+
+SCALE_OUT_MINUTES = 3  # alarm datapoints before a scale-out
+SCALE_IN_MINUTES = 15  # alarm datapoints before a scale-in
+SCALE_IN_THRESHOLD = 0.9  # scale-in alarm fires below 90% of the target
+HEALTH_CHECK_DETECTION = 60  # seconds for the ELB to mark a target unhealthy (2 x 30s)
+
+# Settings Part-3/Part-4 currently hard-code
+CURRENT = {'target': 50.0, 'warmup': 300, 'grace': 300, 'min_size': 2, 'max_size': 3, 'cooldown': 300}
+
+
+# ---------------- Traces ----------------
+def to_minutes(timestamps, values):
+    # Spread every datapoint over the minutes of its period (CloudWatch Sum per 1 or 5 min) on a
+    # wall-clock timeline; minutes without a datapoint are NaN, then carry the last known rate forward
+    order = np.argsort(timestamps)
+    timestamps, values = np.asarray(timestamps, dtype=float)[order], np.asarray(values, dtype=float)[order]
+    period = max(int(np.median(np.diff(timestamps)) // 60), 1) if len(timestamps) > 1 else 1
+    starts = ((timestamps - timestamps[0]) // 60).astype(int)
+    minutes = np.full(starts[-1] + period, np.nan)
+    minutes[(starts[:, None] + np.arange(period)).ravel()] = np.repeat(values / period, period)
+    known = np.where(np.isnan(minutes), 0, np.arange(len(minutes)))
+    return minutes[np.maximum.accumulate(known)]
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def load_csv(path, column=None):
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    time_column = list(rows[0])[0]
+    value_column = column or list(rows[0])[1]
+    return to_minutes([parse_time(r[time_column]) for r in rows], [float(r[value_column] or 0) for r in rows])
+
+
+def load_cloudwatch_json(path):
+    with open(path) as f:
+        export = json.load(f)
+    if 'MetricDataResults' in export:  # aws cloudwatch get-metric-data
+        result = export['MetricDataResults'][0]
+        return to_minutes([parse_time(t) for t in result['Timestamps']], result['Values'])
+    points = export['Datapoints']  # aws cloudwatch get-metric-statistics
+    stat = next(k for k in ('Sum', 'Average', 'Maximum') if k in points[0])
+    return to_minutes([parse_time(p['Timestamp']) for p in points], [p[stat] for p in points])
+
+
+def load_trace(path, column=None):
+    return load_cloudwatch_json(path) if path.endswith('.json') else load_csv(path, column)
+
+
+# ---------------- Simulation ----------------
+def parameter_grid(**choices):
+    keys = list(choices)
+    combos = list(itertools.product(*(choices[k] for k in keys)))
+    return {k: np.array([c[i] for c in combos], dtype=float) for i, k in enumerate(keys)}
+
+
+def simulate(trace, grid, capacity, boot_delay, boot_cpu=100.0, slo_cpu=80.0):
+    # trace: requests per minute; capacity: requests per minute one instance serves at 100% CPU
+    n = len(grid['target'])
+    boot = int(np.ceil(boot_delay / 60))
+    warmup = np.ceil(grid['warmup'] / 60)
+    ages = np.arange(boot + int(warmup.max()) + 2)
+
+    # Instances replaced before they pass the health check never serve
+    grace_ok = grid['grace'] + HEALTH_CHECK_DETECTION >= boot_delay
+    serving_mask = (ages[None, :] >= boot) & grace_ok[:, None]
+    warm_mask = ages[None, :] >= warmup[:, None]
+
+    # pipeline[i, a]: instances of combo i that are a minutes old, the last column holds all older ones
+    pipeline = np.zeros((n, len(ages)))
+    pipeline[:, -1] = grid['min_size']
+    streak_out = np.zeros(n)
+    streak_in = np.zeros(n)
+    last_scale_in = np.full(n, -np.inf)
+    totals = {k: np.zeros(n) for k in ('instance_minutes', 'over', 'under', 'slo_minutes', 'dropped')}
+
+    for minute, load in enumerate(trace):
+        aged = np.zeros_like(pipeline)
+        aged[:, 1:-1] = pipeline[:, :-2]
+        aged[:, -1] = pipeline[:, -2] + pipeline[:, -1]
+        pipeline = aged
+
+        running = pipeline.sum(axis=1)
+        serving = (pipeline * serving_mask).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cpu = np.where(serving > 0, load / (serving * capacity) * 100, 100.0 if load > 0 else 0.0)
+            cpu = np.minimum(cpu, 100.0)
+            warm = pipeline * warm_mask
+            warm_total = warm.sum(axis=1)
+            warm_serving = (warm * serving_mask).sum(axis=1)
+            metric = (warm_serving * cpu + (warm_total - warm_serving) * boot_cpu) / warm_total
+
+        needed = max(np.ceil(load / (capacity * slo_cpu / 100)), 1)
+        totals['instance_minutes'] += running
+        totals['over'] += np.maximum(running - needed, 0)
+        totals['under'] += np.maximum(needed - serving, 0)
+        totals['slo_minutes'] += cpu > slo_cpu
+        totals['dropped'] += np.maximum(load - serving * capacity, 0)
+
+        # No warm instance means no datapoint: the alarms keep their state
+        has_metric = warm_total > 0
+        streak_out = np.where(has_metric, (streak_out + 1) * (metric > grid['target']), streak_out)
+        streak_in = np.where(has_metric, (streak_in + 1) * (metric < grid['target'] * SCALE_IN_THRESHOLD), streak_in)
+        # The metric only covers warm instances, so they size the group; instances still
+        # warming up count towards the capacity already added instead of being scaled again
+        desired = np.clip(np.ceil(warm_total * np.nan_to_num(metric) / grid['target']),
+                          grid['min_size'], grid['max_size'])
+
+        scale_out = has_metric & (streak_out >= SCALE_OUT_MINUTES) & (desired > running)
+        pipeline[:, 0] += np.where(scale_out, np.maximum(desired - running, 0), 0)
+
+        scale_in = (has_metric & (streak_in >= SCALE_IN_MINUTES) & (desired < running)
+                    & (minute - last_scale_in >= grid['cooldown'] / 60))
+        remove = np.where(scale_in, running - desired, 0)
+        # The youngest instances go first
+        kept = np.maximum(np.cumsum(pipeline, axis=1) - remove[:, None], 0)
+        pipeline = np.diff(kept, axis=1, prepend=0)
+        last_scale_in = np.where(scale_in, minute, last_scale_in)
+        streak_in = np.where(scale_in, 0, streak_in)
+    return totals
+
+
+# ---------------- Report ----------------
+def rank(totals):
+    # SLO minutes first, then dropped requests, then cost
+    return np.lexsort((totals['instance_minutes'], totals['dropped'], totals['slo_minutes']))
+
+
+def print_row(grid, totals, i, marker=''):
+    print(f"   {grid['target'][i]:>6.0f} {grid['warmup'][i]:>7.0f} {grid['grace'][i]:>6.0f} "
+          f"{grid['min_size'][i]:>4.0f} {grid['max_size'][i]:>4.0f} {grid['cooldown'][i]:>8.0f} "
+          f"{totals['slo_minutes'][i]:>8.0f} {totals['under'][i]:>8.0f} {totals['over'][i]:>8.0f} "
+          f"{totals['instance_minutes'][i]:>9.0f} {totals['dropped'][i]:>10.0f}{marker}")
+
+
+def print_report(grid, totals, minutes, top=10):
+    print(f"📈 {len(grid['target'])} combinations x {minutes} minutes")
+    print(f"   {'target':>6} {'warmup':>7} {'grace':>6} {'min':>4} {'max':>4} {'cooldown':>8} "
+          f"{'slo min':>8} {'under':>8} {'over':>8} {'inst-min':>9} {'dropped':>10}")
+    order = rank(totals)
+    for i in order[:top]:
+        print_row(grid, totals, i)
+
+    current = np.ones(len(grid['target']), dtype=bool)
+    for key, value in CURRENT.items():
+        current &= grid[key] == value
+    if current.any():
+        i = int(np.flatnonzero(current)[0])
+        position = int(np.flatnonzero(order == i)[0]) + 1
+        print(f"\n   Current Part-3/Part-4 settings rank {position} of {len(order)}:")
+        print_row(grid, totals, i, '  ⬅️')
+
+
+def values(text, cast=float):
+    return [cast(v) for v in text.split(',')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a traffic trace through target tracking settings")
+    parser.add_argument('trace', help="CSV (timestamp, requests) or CloudWatch get-metric-data/-statistics JSON")
+    parser.add_argument('--column', help="CSV column with the request count (default: second column)")
+    parser.add_argument('--capacity', type=float, required=True,
+                        help="requests per minute one instance serves at 100%% CPU")
+    parser.add_argument('--boot-delay', type=float, default=180, help="seconds from launch to serving (boot_profiler.py)")
+    parser.add_argument('--boot-cpu', type=float, default=100, help="CPU %% a booting instance reports")
+    parser.add_argument('--slo-cpu', type=float, default=80, help="CPU %% above which latency breaks the SLO")
+    parser.add_argument('--targets', default='40,50,60,70')
+    parser.add_argument('--warmups', default='60,120,180,300')
+    parser.add_argument('--graces', default='60,120,180,300')
+    parser.add_argument('--min-sizes', default='1,2,3')
+    parser.add_argument('--max-sizes', default='3,4,6,8,12')
+    parser.add_argument('--cooldowns', default='60,300,600')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace, args.column)
+    grid = parameter_grid(target=values(args.targets), warmup=values(args.warmups), grace=values(args.graces),
+                          min_size=values(args.min_sizes), max_size=values(args.max_sizes),
+                          cooldown=values(args.cooldowns))
+    valid = grid['min_size'] <= grid['max_size']
+    grid = {k: v[valid] for k, v in grid.items()}
+    totals = simulate(trace, grid, args.capacity, args.boot_delay, args.boot_cpu, args.slo_cpu)
+    print_report(grid, totals, len(trace), args.top)
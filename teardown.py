@@ -0,0 +1,491 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.exceptions import ClientError, WaiterError
+from inventory import (Inventory, SECURITY_GROUP, LAUNCH_TEMPLATE, LOAD_BALANCER, TARGET_GROUP,
+                       AUTO_SCALING_GROUP, DB_INSTANCE, DB_SUBNET_GROUP)
+
+# ---------------- Stack Teardown Engine ----------------
+# Discovers everything that belongs to a stack (the VPC from Part-1 and every
+# tier built inside it) and deletes it in reverse-dependency waves. Tasks in a
+# wave run in parallel; each task waits on the resource itself (waiters, ENI
+# draining, DependencyViolation retries) instead of sleeping a fixed time.
+# Resources without a VPC are found through what references them: instance
+# profiles, placement groups and SSM parameters through the launch templates,
+# log buckets and Route 53 records/health checks through the load balancers.
+
+# Error codes meaning the resource is already gone (besides every '*NotFound*' code)
+NOT_FOUND = ('NoSuchDistribution', 'NoSuchEntity', 'NoSuchBucket', 'NoSuchHealthCheck',
+             'InvalidPlacementGroup.Unknown')
+
+# Requester-managed ENIs of the services deleted above, AWS releases them once the owner is gone
+RELEASED_INTERFACE_TYPES = ('nat_gateway', 'vpc_endpoint')
+RELEASED_DESCRIPTIONS = ('ELB ', 'RDSNetworkInterface', 'ElastiCache ')
+
+WAVES = [
+    'compute and data',  # ASGs, instances, listeners, RDS, Redis, CloudFront, Route 53 records
+    'load balancers and templates',  # ALBs, launch templates, subnet groups, NAT gateways, endpoints
+    'outside the vpc',  # instance profiles and roles, SSM parameters, placement groups, access logs
+    'network interfaces',  # wait for ELB/RDS/NAT ENIs to be released
+    'target groups and security groups',
+    'subnets, route tables and gateways',
+    'vpc',
+]
+
+
+# ---------------- Helpers ----------------
+def retry(call, codes=('DependencyViolation', 'ResourceInUse'), timeout=900):
+    # Retries while the resource is still held by something that is going away
+    deadline = time.time() + timeout
+    delay = 5
+    while True:
+        try:
+            return call()
+        except ClientError as e:
+            if e.response['Error']['Code'] not in codes or time.time() > deadline:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+def drains(eni):
+    # Only interfaces the teardown can delete or whose owner it deleted, other
+    # requester-managed ones (Lambda, other services) would never go away
+    if not eni.get('RequesterManaged'):
+        return True
+    return (eni.get('InterfaceType') in RELEASED_INTERFACE_TYPES
+            or eni.get('Description', '').startswith(RELEASED_DESCRIPTIONS))
+
+
+def paginate(client, operation, key, **kwargs):
+    for page in client.get_paginator(operation).paginate(**kwargs):
+        yield from page[key]
+
+
+def alias_dns_name(name):
+    # Route 53 stores alias targets lower-cased, with a trailing dot and sometimes 'dualstack.'
+    name = name.lower().rstrip('.')
+    return name[len('dualstack.'):] if name.startswith('dualstack.') else name
+
+
+def vpc_filter(vpc_id, name='vpc-id'):
+    return [{'Name': name, 'Values': [vpc_id]}]
+
+
+class Teardown:
+    def __init__(self, session, vpc_id, workers=16, include_cloudfront=True):
+        self.vpc_id = vpc_id
+        self.workers = workers
+        self.include_cloudfront = include_cloudfront
+        self.inventory = Inventory(session)
+        self.ec2 = session.client('ec2')
+        self.elbv2 = session.client('elbv2')
+        self.autoscaling = session.client('autoscaling')
+        self.rds = session.client('rds')
+        self.elasticache = session.client('elasticache')
+        self.cloudfront = session.client('cloudfront')
+        self.iam = session.client('iam')
+        self.ssm = session.client('ssm')
+        self.s3 = session.client('s3')
+        self.route53 = session.client('route53')
+        self.waves = [[] for _ in WAVES]
+
+    def add(self, wave, label, action, *args):
+        self.waves[WAVES.index(wave)].append((label, action, args))
+
+    # ---------------- Discovery ----------------
+    def discover(self):
+        inv = self.inventory.refresh([SECURITY_GROUP, LAUNCH_TEMPLATE, LOAD_BALANCER, TARGET_GROUP,
+                                      AUTO_SCALING_GROUP, DB_INSTANCE, DB_SUBNET_GROUP])
+
+        def in_vpc(record):
+            return record.get('vpc_id') == self.vpc_id
+
+        subnets = list(paginate(self.ec2, 'describe_subnets', 'Subnets', Filters=vpc_filter(self.vpc_id)))
+        subnet_ids = {s['SubnetId'] for s in subnets}
+
+        asgs = [r for r in inv.of_type(AUTO_SCALING_GROUP) if subnet_ids & set(r.get('subnet_ids', []))]
+        for asg in asgs:
+            self.add('compute and data', f"auto scaling group {asg['name']}", self.delete_asg, asg['name'])
+        launch_templates = {asg['launch_template'] for asg in asgs
+                            if asg.get('launch_template') and inv.get(LAUNCH_TEMPLATE, asg['launch_template'])}
+        for name in launch_templates:
+            self.add('load balancers and templates', f"launch template {name}", self.delete_launch_template, name)
+
+        reservations = paginate(self.ec2, 'describe_instances', 'Reservations', Filters=vpc_filter(self.vpc_id) + [
+            {'Name': 'instance-state-name', 'Values': ['pending', 'running', 'stopping', 'stopped']}])
+        standalone = [i['InstanceId'] for r in reservations for i in r['Instances']
+                      if not any(t['Key'] == 'aws:autoscaling:groupName' for t in i.get('Tags', []))]
+        if standalone:
+            self.add('compute and data', f"instances {', '.join(standalone)}", self.terminate_instances, standalone)
+
+        lbs = [r for r in inv.of_type(LOAD_BALANCER) if in_vpc(r)]
+        for lb in lbs:
+            for listener in paginate(self.elbv2, 'describe_listeners', 'Listeners', LoadBalancerArn=lb['id']):
+                self.add('compute and data', f"listener {lb['name']}:{listener['Port']}",
+                         self.delete_listener, listener['ListenerArn'])
+            self.add('load balancers and templates', f"load balancer {lb['name']}", self.delete_load_balancer, lb['id'])
+        for tg in inv.of_type(TARGET_GROUP):
+            if in_vpc(tg):
+                self.add('target groups and security groups', f"target group {tg['name']}",
+                         self.delete_target_group, tg['id'])
+
+        for db in inv.of_type(DB_INSTANCE):
+            if in_vpc(db):
+                self.add('compute and data', f"rds instance {db['name']}", self.delete_db_instance, db['id'])
+        for group in inv.of_type(DB_SUBNET_GROUP):
+            if in_vpc(group):
+                self.add('load balancers and templates', f"db subnet group {group['name']}",
+                         self.delete_db_subnet_group, group['id'])
+
+        cache_groups = {g['CacheSubnetGroupName'] for g in paginate(
+            self.elasticache, 'describe_cache_subnet_groups', 'CacheSubnetGroups') if g.get('VpcId') == self.vpc_id}
+        replication_groups = {c['ReplicationGroupId'] for c in paginate(
+            self.elasticache, 'describe_cache_clusters', 'CacheClusters')
+            if c.get('CacheSubnetGroupName') in cache_groups and c.get('ReplicationGroupId')}
+        for group_id in replication_groups:
+            self.add('compute and data', f"redis replication group {group_id}", self.delete_replication_group, group_id)
+        for name in cache_groups:
+            self.add('load balancers and templates', f"cache subnet group {name}", self.delete_cache_subnet_group, name)
+
+        if self.include_cloudfront:
+            lb_dns_names = {lb.get('dns_name') for lb in lbs}
+            for page in self.cloudfront.get_paginator('list_distributions').paginate():
+                for item in page['DistributionList'].get('Items', []):
+                    if any(o['DomainName'] in lb_dns_names for o in item['Origins']['Items']):
+                        self.add('compute and data', f"cloudfront distribution {item['Id']}",
+                                 self.delete_distribution, item['Id'])
+
+        for nat in paginate(self.ec2, 'describe_nat_gateways', 'NatGateways', Filter=vpc_filter(self.vpc_id) + [
+                {'Name': 'state', 'Values': ['pending', 'available']}]):
+            allocations = [a['AllocationId'] for a in nat.get('NatGatewayAddresses', []) if a.get('AllocationId')]
+            self.add('load balancers and templates', f"nat gateway {nat['NatGatewayId']}",
+                     self.delete_nat_gateway, nat['NatGatewayId'], allocations)
+        endpoints = [e['VpcEndpointId'] for e in paginate(self.ec2, 'describe_vpc_endpoints', 'VpcEndpoints',
+                                                           Filters=vpc_filter(self.vpc_id))]
+        if endpoints:
+            self.add('load balancers and templates', f"vpc endpoints {', '.join(endpoints)}",
+                     self.delete_vpc_endpoints, endpoints)
+
+        self.discover_outside_vpc(launch_templates, lbs, replication_groups)
+
+        self.add('network interfaces', f"network interfaces in {self.vpc_id}", self.drain_network_interfaces)
+        for sg in inv.of_type(SECURITY_GROUP):
+            if in_vpc(sg) and sg['name'] != 'default':
+                self.add('target groups and security groups', f"security group {sg['name']}",
+                         self.delete_security_group, sg['id'])
+
+        for subnet in subnets:
+            self.add('subnets, route tables and gateways', f"subnet {subnet['SubnetId']}",
+                     self.delete_subnet, subnet['SubnetId'])
+        for rtb in paginate(self.ec2, 'describe_route_tables', 'RouteTables', Filters=vpc_filter(self.vpc_id)):
+            if not any(a.get('Main') for a in rtb.get('Associations', [])):
+                self.add('subnets, route tables and gateways', f"route table {rtb['RouteTableId']}",
+                         self.delete_route_table, rtb)
+        for igw in paginate(self.ec2, 'describe_internet_gateways', 'InternetGateways',
+                            Filters=vpc_filter(self.vpc_id, 'attachment.vpc-id')):
+            self.add('subnets, route tables and gateways', f"internet gateway {igw['InternetGatewayId']}",
+                     self.delete_internet_gateway, igw['InternetGatewayId'])
+        self.add('vpc', f"vpc {self.vpc_id}", self.delete_vpc)
+        return self
+
+    def discover_outside_vpc(self, launch_templates, lbs, replication_groups):
+        profiles, placement_groups = set(), set()
+        for name in launch_templates:
+            data = self.ec2.describe_launch_template_versions(
+                LaunchTemplateName=name, Versions=['$Default'])['LaunchTemplateVersions'][0]['LaunchTemplateData']
+            profile = data.get('IamInstanceProfile', {})
+            if profile:
+                profiles.add(profile.get('Name') or profile['Arn'].split('/')[-1])
+            if data.get('Placement', {}).get('GroupName'):
+                placement_groups.add(data['Placement']['GroupName'])
+        for name in profiles:
+            self.add('outside the vpc', f"instance profile {name} and its roles", self.delete_instance_profile, name)
+            # The cache endpoint Part6 exports goes with the cache it points at
+            if replication_groups:
+                for parameter in self.readable_parameters(name):
+                    self.add('outside the vpc', f"ssm parameter {parameter}", self.delete_parameter, parameter)
+        for name in placement_groups:
+            self.add('outside the vpc', f"placement group {name}", self.delete_placement_group, name)
+
+        log_prefixes = {}
+        for lb in lbs:
+            attributes = {a['Key']: a['Value'] for a in self.elbv2.describe_load_balancer_attributes(
+                LoadBalancerArn=lb['id'])['Attributes']}
+            if attributes.get('access_logs.s3.bucket'):
+                log_prefixes.setdefault(attributes['access_logs.s3.bucket'], set()).add(
+                    attributes.get('access_logs.s3.prefix', ''))
+        for bucket, prefixes in log_prefixes.items():
+            self.add('outside the vpc', f"access logs in s3://{bucket}", self.delete_access_logs, bucket,
+                     sorted(prefixes))
+
+        # Part7 latency records and their health checks, removed first so DNS stops sending users here
+        dns_names = {alias_dns_name(lb['dns_name']) for lb in lbs if lb.get('dns_name')}
+        if not dns_names:
+            return
+        records = {}
+        for zone in paginate(self.route53, 'list_hosted_zones', 'HostedZones'):
+            for record in paginate(self.route53, 'list_resource_record_sets', 'ResourceRecordSets',
+                                   HostedZoneId=zone['Id']):
+                if alias_dns_name(record.get('AliasTarget', {}).get('DNSName', '')) in dns_names:
+                    records.setdefault(zone['Id'], []).append(record)
+        health_checks = [h['Id'] for h in paginate(self.route53, 'list_health_checks', 'HealthChecks')
+                         if alias_dns_name(h['HealthCheckConfig'].get('FullyQualifiedDomainName', '')) in dns_names]
+        if records or health_checks:
+            count = sum(len(r) for r in records.values())
+            self.add('compute and data', f"{count} route 53 record(s) and {len(health_checks)} health check(s)",
+                     self.delete_dns, records, health_checks)
+
+    def readable_parameters(self, profile_name):
+        # SSM parameters the instance profile's roles were granted ssm:GetParameter on
+        region = self.ssm.meta.region_name
+        names = set()
+        try:
+            roles = self.iam.get_instance_profile(InstanceProfileName=profile_name)['InstanceProfile']['Roles']
+        except ClientError:
+            return names
+        for role in roles:
+            for policy_name in self.iam.list_role_policies(RoleName=role['RoleName'])['PolicyNames']:
+                document = self.iam.get_role_policy(RoleName=role['RoleName'], PolicyName=policy_name)['PolicyDocument']
+                statements = document['Statement'] if isinstance(document['Statement'], list) else [document['Statement']]
+                for statement in statements:
+                    actions = statement.get('Action', [])
+                    resources = statement.get('Resource', [])
+                    if 'ssm:GetParameter' not in (actions if isinstance(actions, list) else [actions]):
+                        continue
+                    for arn in resources if isinstance(resources, list) else [resources]:
+                        if arn.startswith(f"arn:aws:ssm:{region}:") and ':parameter/' in arn:
+                            names.add(arn.split(':parameter', 1)[1])
+        return names
+
+    # ---------------- Delete Actions ----------------
+    def delete_asg(self, name, timeout=900):
+        try:
+            self.autoscaling.delete_auto_scaling_group(AutoScalingGroupName=name, ForceDelete=True)
+        except ClientError as e:
+            # Already gone (deleted by hand or by an earlier run)
+            if e.response['Error']['Code'] == 'ValidationError' and 'not found' in e.response['Error']['Message']:
+                return
+            raise
+        # The group disappears once all of its instances are terminated
+        deadline = time.time() + timeout
+        while self.autoscaling.describe_auto_scaling_groups(AutoScalingGroupNames=[name])['AutoScalingGroups']:
+            if time.time() > deadline:
+                raise TimeoutError(f"Auto Scaling group {name} still deleting after {timeout}s")
+            time.sleep(10)
+
+    def terminate_instances(self, instance_ids):
+        self.ec2.terminate_instances(InstanceIds=instance_ids)
+        self.ec2.get_waiter('instance_terminated').wait(InstanceIds=instance_ids)
+
+    def delete_listener(self, arn):
+        self.elbv2.delete_listener(ListenerArn=arn)
+
+    def delete_db_instance(self, identifier):
+        self.rds.delete_db_instance(DBInstanceIdentifier=identifier, SkipFinalSnapshot=True,
+                                    DeleteAutomatedBackups=True)
+        self.rds.get_waiter('db_instance_deleted').wait(DBInstanceIdentifier=identifier,
+                                                        WaiterConfig={'Delay': 20, 'MaxAttempts': 90})
+
+    def delete_replication_group(self, group_id):
+        self.elasticache.delete_replication_group(ReplicationGroupId=group_id, RetainPrimaryCluster=False)
+        self.elasticache.get_waiter('replication_group_deleted').wait(ReplicationGroupId=group_id)
+
+    def delete_distribution(self, dist_id):
+        config = self.cloudfront.get_distribution_config(Id=dist_id)
+        if config['DistributionConfig']['Enabled']:
+            config['DistributionConfig']['Enabled'] = False
+            self.cloudfront.update_distribution(Id=dist_id, IfMatch=config['ETag'],
+                                                DistributionConfig=config['DistributionConfig'])
+        self.cloudfront.get_waiter('distribution_deployed').wait(Id=dist_id,
+                                                                 WaiterConfig={'Delay': 30, 'MaxAttempts': 60})
+        etag = self.cloudfront.get_distribution(Id=dist_id)['ETag']
+        self.cloudfront.delete_distribution(Id=dist_id, IfMatch=etag)
+
+    def delete_load_balancer(self, arn):
+        self.elbv2.delete_load_balancer(LoadBalancerArn=arn)
+        self.elbv2.get_waiter('load_balancers_deleted').wait(LoadBalancerArns=[arn])
+
+    def delete_launch_template(self, name):
+        self.ec2.delete_launch_template(LaunchTemplateName=name)
+
+    def delete_db_subnet_group(self, name):
+        retry(lambda: self.rds.delete_db_subnet_group(DBSubnetGroupName=name), codes=('InvalidDBSubnetGroupStateFault',))
+
+    def delete_cache_subnet_group(self, name):
+        retry(lambda: self.elasticache.delete_cache_subnet_group(CacheSubnetGroupName=name),
+              codes=('CacheSubnetGroupInUse',))
+
+    def delete_nat_gateway(self, nat_id, allocation_ids):
+        self.ec2.delete_nat_gateway(NatGatewayId=nat_id)
+        self.ec2.get_waiter('nat_gateway_deleted').wait(NatGatewayIds=[nat_id])
+        for allocation_id in allocation_ids:
+            self.ec2.release_address(AllocationId=allocation_id)
+
+    def delete_vpc_endpoints(self, endpoint_ids):
+        self.ec2.delete_vpc_endpoints(VpcEndpointIds=endpoint_ids)
+
+    def drain_network_interfaces(self, timeout=900):
+        # ELB, RDS and NAT interfaces are released asynchronously after their owner is gone
+        deadline = time.time() + timeout
+        while True:
+            enis = [eni for eni in paginate(self.ec2, 'describe_network_interfaces', 'NetworkInterfaces',
+                                            Filters=vpc_filter(self.vpc_id)) if drains(eni)]
+            for eni in enis:
+                if eni['Status'] == 'available':
+                    try:
+                        self.ec2.delete_network_interface(NetworkInterfaceId=eni['NetworkInterfaceId'])
+                    except ClientError:
+                        pass
+            if not enis:
+                return
+            if time.time() > deadline:
+                raise TimeoutError(f"{len(enis)} network interface(s) still in use in {self.vpc_id}")
+            time.sleep(10)
+
+    def delete_instance_profile(self, name):
+        profile = self.iam.get_instance_profile(InstanceProfileName=name)['InstanceProfile']
+        for role in profile['Roles']:
+            self.iam.remove_role_from_instance_profile(InstanceProfileName=name, RoleName=role['RoleName'])
+        self.iam.delete_instance_profile(InstanceProfileName=name)
+        for role in profile['Roles']:
+            # A role another profile still uses stays
+            if self.iam.list_instance_profiles_for_role(RoleName=role['RoleName'])['InstanceProfiles']:
+                continue
+            for policy_name in self.iam.list_role_policies(RoleName=role['RoleName'])['PolicyNames']:
+                self.iam.delete_role_policy(RoleName=role['RoleName'], PolicyName=policy_name)
+            for policy in self.iam.list_attached_role_policies(RoleName=role['RoleName'])['AttachedPolicies']:
+                self.iam.detach_role_policy(RoleName=role['RoleName'], PolicyArn=policy['PolicyArn'])
+            self.iam.delete_role(RoleName=role['RoleName'])
+
+    def delete_parameter(self, name):
+        self.ssm.delete_parameter(Name=name)
+
+    def delete_placement_group(self, name):
+        # Terminated instances leave the group a little after the ASG is gone
+        retry(lambda: self.ec2.delete_placement_group(GroupName=name), codes=('InvalidPlacementGroup.InUse',))
+
+    def delete_access_logs(self, bucket, prefixes):
+        # Only this stack's prefixes; the bucket goes too once nothing else logs into it
+        for prefix in prefixes:
+            pages = self.s3.get_paginator('list_objects_v2').paginate(
+                Bucket=bucket, Prefix=f"{prefix}/" if prefix else '')
+            for page in pages:
+                keys = [{'Key': o['Key']} for o in page.get('Contents', [])]
+                if keys:
+                    self.s3.delete_objects(Bucket=bucket, Delete={'Objects': keys, 'Quiet': True})
+        try:
+            self.s3.delete_bucket(Bucket=bucket)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'BucketNotEmpty':
+                raise
+
+    def delete_dns(self, records, health_checks):
+        for zone_id, zone_records in records.items():
+            change_id = self.route53.change_resource_record_sets(
+                HostedZoneId=zone_id,
+                ChangeBatch={'Changes': [{'Action': 'DELETE', 'ResourceRecordSet': r} for r in zone_records]}
+            )['ChangeInfo']['Id']
+            self.route53.get_waiter('resource_record_sets_changed').wait(Id=change_id)
+        # Health checks can only go once no record references them
+        for health_check_id in health_checks:
+            self.route53.delete_health_check(HealthCheckId=health_check_id)
+
+    def delete_target_group(self, arn):
+        retry(lambda: self.elbv2.delete_target_group(TargetGroupArn=arn))
+
+    def delete_security_group(self, group_id):
+        # Drop rules that reference other groups first, otherwise the groups block each other
+        group = self.ec2.describe_security_groups(GroupIds=[group_id])['SecurityGroups'][0]
+        ingress = [p for p in group['IpPermissions'] if p.get('UserIdGroupPairs')]
+        egress = [p for p in group['IpPermissionsEgress'] if p.get('UserIdGroupPairs')]
+        if ingress:
+            self.ec2.revoke_security_group_ingress(GroupId=group_id, IpPermissions=ingress)
+        if egress:
+            self.ec2.revoke_security_group_egress(GroupId=group_id, IpPermissions=egress)
+        retry(lambda: self.ec2.delete_security_group(GroupId=group_id))
+
+    def delete_subnet(self, subnet_id):
+        retry(lambda: self.ec2.delete_subnet(SubnetId=subnet_id))
+
+    def delete_route_table(self, rtb):
+        for assoc in rtb.get('Associations', []):
+            if 'RouteTableAssociationId' in assoc:
+                self.ec2.disassociate_route_table(AssociationId=assoc['RouteTableAssociationId'])
+        retry(lambda: self.ec2.delete_route_table(RouteTableId=rtb['RouteTableId']))
+
+    def delete_internet_gateway(self, igw_id):
+        retry(lambda: self.ec2.detach_internet_gateway(InternetGatewayId=igw_id, VpcId=self.vpc_id))
+        self.ec2.delete_internet_gateway(InternetGatewayId=igw_id)
+
+    def delete_vpc(self):
+        retry(lambda: self.ec2.delete_vpc(VpcId=self.vpc_id))
+
+    # ---------------- Execution ----------------
+    def run_task(self, label, action, args):
+        try:
+            action(*args)
+            return f"🗑️ Deleted {label}"
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if 'NotFound' in code or code in NOT_FOUND:
+                return f"ℹ️ {label} already deleted"
+            raise
+
+    def plan(self):
+        for name, tasks in zip(WAVES, self.waves):
+            print(f"🌊 Wave {WAVES.index(name) + 1} - {name}: {len(tasks)} task(s)")
+            for label, _, _ in tasks:
+                print(f"   - {label}")
+
+    def run(self):
+        started = time.time()
+        failures = 0
+        for number, (name, tasks) in enumerate(zip(WAVES, self.waves), start=1):
+            if not tasks:
+                continue
+            wave_started = time.time()
+            print(f"🌊 Wave {number} - {name} ({len(tasks)} task(s))")
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(self.run_task, *task): task[0] for task in tasks}
+                for future in as_completed(futures):
+                    try:
+                        print(f"   {future.result()}")
+                    except (ClientError, WaiterError, TimeoutError) as e:
+                        failures += 1
+                        message = e.response['Error']['Message'] if isinstance(e, ClientError) else str(e)
+                        print(f"   ❌ Failed to delete {futures[future]}: {message}")
+            print(f"   ⏱️ {time.time() - wave_started:.0f}s")
+            if failures:
+                print("❌ Stopping: later waves depend on the resources that failed to delete.")
+                return False
+        print(f"✅ Stack in {self.vpc_id} torn down in {time.time() - started:.0f}s")
+        return True
+
+
+if __name__ == "__main__":
+    import boto3
+
+    parser = argparse.ArgumentParser(description="Tear down every tier of a stack, including its VPC")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--vpc-id', help="VPC the stack was built in")
+    group.add_argument('--vpc-name', help="Name tag of the VPC (e.g. project-vpc)")
+    parser.add_argument('--region', default="us-east-1", help="region the stack lives in")
+    parser.add_argument('--workers', type=int, default=16, help="parallel deletions per wave")
+    parser.add_argument('--skip-cloudfront', action='store_true', help="leave CloudFront distributions alone")
+    parser.add_argument('--dry-run', action='store_true', help="only print the deletion plan")
+    args = parser.parse_args()
+
+    session = boto3.session.Session(profile_name="boto3-user", region_name=args.region)
+    vpc_id = args.vpc_id
+    if args.vpc_name:
+        vpcs = session.client('ec2').describe_vpcs(Filters=[{'Name': 'tag:Name', 'Values': [args.vpc_name]}])['Vpcs']
+        if len(vpcs) != 1:
+            print(f"❌ Expected exactly one VPC named '{args.vpc_name}', found {len(vpcs)}.")
+            exit(1)
+        vpc_id = vpcs[0]['VpcId']
+
+    teardown = Teardown(session, vpc_id, args.workers, not args.skip_cloudfront).discover()
+    teardown.plan()
+    if not args.dry_run:
+        exit(0 if teardown.run() else 1)
@@ -0,0 +1,103 @@
+import base64
+
+# ---------------- User Data Templates ----------------
+# Renders the boot script shared by the web and app tiers: stock httpd from
+# yum, switched to the event MPM and tuned for sitting behind an ALB
+# (keep-alive longer than the ALB idle timeout, compression, caching headers
+# for static files) plus a static /health page for the target group checks.
+# Worker counts are computed on the instance from nproc and MemTotal, so the
+# same launch template fits every type of a Mixed Instances Policy.
+
+ALB_IDLE_TIMEOUT = 60  # seconds, set on the load balancers in Part-3/Part-4
+HEALTH_CHECK_PATH = '/health'
+
+THREADS_PER_CHILD = 25
+SERVERS_PER_VCPU = 4  # child processes per vCPU before memory is the limit
+MB_PER_SERVER = 48  # resident size of one event MPM child with its threads
+RESERVED_MB = 256  # left for the OS, the agents and the application
+
+STATIC_EXTENSIONS = ['css', 'js', 'png', 'jpg', 'jpeg', 'gif', 'svg', 'ico', 'woff', 'woff2']
+STATIC_MAX_AGE = 604800  # one week
+COMPRESSED_TYPES = ['text/html', 'text/plain', 'text/css', 'text/xml', 'application/javascript',
+                    'application/json', 'application/xml', 'image/svg+xml']
+
+
+def mpm_sizing():
+    # Shell that sizes the MPM on the instance itself
+    return f'''VCPUS=$(nproc)
+MEM_MB=$(awk '/MemTotal/ {{print int($2 / 1024)}}' /proc/meminfo)
+SERVERS=$((VCPUS * {SERVERS_PER_VCPU}))
+MEM_SERVERS=$(((MEM_MB - {RESERVED_MB}) / {MB_PER_SERVER}))
+[ "$MEM_SERVERS" -lt "$SERVERS" ] && SERVERS=$MEM_SERVERS
+[ "$SERVERS" -lt 2 ] && SERVERS=2
+WORKERS=$((SERVERS * {THREADS_PER_CHILD}))'''
+
+
+def httpd_profile(alb_idle_timeout=ALB_IDLE_TIMEOUT):
+    # The backend must keep idle connections open longer than the ALB does,
+    # otherwise the ALB reuses a connection httpd is closing and returns a 502.
+    keepalive_timeout = alb_idle_timeout + 5
+    static_files = '|'.join(STATIC_EXTENSIONS)
+    return f'''cat > /etc/httpd/conf.modules.d/00-mpm.conf <<'EOF'
+LoadModule mpm_event_module modules/mod_mpm_event.so
+EOF
+cat > /etc/httpd/conf.d/performance.conf <<EOF
+<IfModule mpm_event_module>
+    StartServers 2
+    ServerLimit $SERVERS
+    ThreadsPerChild {THREADS_PER_CHILD}
+    ThreadLimit {THREADS_PER_CHILD}
+    MaxRequestWorkers $WORKERS
+    MinSpareThreads {THREADS_PER_CHILD}
+    MaxSpareThreads $((WORKERS / 2))
+    AsyncRequestWorkerFactor 2
+    MaxConnectionsPerChild 10000
+</IfModule>
+
+KeepAlive On
+KeepAliveTimeout {keepalive_timeout}
+MaxKeepAliveRequests 0
+Timeout {keepalive_timeout}
+
+<IfModule mod_deflate.c>
+    AddOutputFilterByType DEFLATE {' '.join(COMPRESSED_TYPES)}
+</IfModule>
+
+<FilesMatch "\\.({static_files})$">
+    Header set Cache-Control "public, max-age={STATIC_MAX_AGE}"
+</FilesMatch>
+
+<Location "{HEALTH_CHECK_PATH}">
+    ForceType text/plain
+    Header set Cache-Control "no-store"
+</Location>
+EOF'''
+
+
+def render_user_data(page_html='<h1>My Company Website</h1>', extra_lines=(), alb_idle_timeout=ALB_IDLE_TIMEOUT):
+    lines = [
+        '#!/bin/bash',
+        '# BOOT_PHASE markers (seconds since boot) are read by boot_profiler.py',
+        'phase() { echo "BOOT_PHASE $1 $(cut -d\' \' -f1 /proc/uptime)"; }',
+        'phase yum-update',
+        'yum update -y',
+        'phase yum-install-httpd',
+        'yum install -y httpd',
+        'phase httpd-configure',
+        mpm_sizing(),
+        httpd_profile(alb_idle_timeout),
+        f'echo ok > /var/www/html{HEALTH_CHECK_PATH}',
+        'phase httpd-start',
+        'systemctl start httpd',
+        'systemctl enable httpd',
+        'cd /var/www/html',
+        f'echo "{page_html}" > index.html',
+        *extra_lines,
+        'phase cloud-init-wrapup',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def encode(script):
+    # Launch templates take the user data base64 encoded
+    return base64.b64encode(script.encode('utf-8')).decode('utf-8')